@@ -8,6 +8,8 @@ from PySide6.QtWidgets import QLineEdit, QPlainTextEdit, QComboBox, QFrame, QRad
 from controllers.message_box_controller import MessageBoxController
 from utils.functions import match, get_closest_match, get_option, normalize_string, open_link
 from utils.drive_service import DriveService
+from utils.db_manager import DbManager
+from utils.outbox import cancel_drive_upload, has_pending_upload, queue_drive_delete, queue_drive_upload
 from utils.functions import format_file_name_with_id, generate_deterministic_id, get_file_extension, get_name_id
 
 
@@ -211,10 +213,12 @@ class PlainPushButtonController:
 
 
 class ImportPushButtonController:
-    def __init__(self, drive_service: DriveService, import_button: QPushButton, data_dict: dict, file, parent = None) -> None:
+    def __init__(self, drive_service: DriveService, db_manager: DbManager, import_button: QPushButton, data_dict: dict, file, parent = None) -> None:
         self.parent = None
         self.import_button = import_button
         self.data = data_dict
+        self.db_manager = db_manager
+        self.file = file
         if file == "resume":
             self.file_type = "document"
         else:
@@ -242,10 +246,18 @@ class ImportPushButtonController:
         name_id = get_name_id(self.data["full_name"])
         doc_id  = generate_deterministic_id(self.data["id_document_number"])
         file_name = format_file_name_with_id(doc_id, name_id, output_ext)
-        if self.file_type == "image":
-            file_link = self.drive_service.import_local_photo(file_path, file_name, True)
-        else:
-            file_link = self.drive_service.import_local_resume(file_path, file_name, True)
+        file_link = ""
+        if self.drive_service.restart_service():
+            try:
+                if self.file_type == "image":
+                    file_link = self.drive_service.import_local_photo(file_path, file_name, True)
+                else:
+                    file_link = self.drive_service.import_local_resume(file_path, file_name, True)
+            except Exception as e:
+                print(f"Error al subir el archivo: {e}")
+        if not file_link:
+            # Sin conexión la subida queda en la bandeja de salida y el enlace se completa al enviarse
+            queue_drive_upload(self.db_manager, self.data["id"], self.file, file_path, file_name)
         self.data[self.file_name] = file_name
         self.data[self.file_link] = file_link
 
@@ -261,31 +273,37 @@ class ImportPushButtonController:
 
 
 class DeleteFilePushButtonController:
-    def __init__(self, drive_service: DriveService, button: QPushButton, data: dict, file: str, parent = None) -> None:
+    def __init__(self, drive_service: DriveService, db_manager: DbManager, button: QPushButton, data: dict, file: str, parent = None) -> None:
         self.parent = None
         self.drive_service = drive_service
+        self.db_manager = db_manager
         self.button = button
         self.button.clicked.connect(self.on_delete_push_button)
         self.data = data
         self.custom_func = None
+        self.file = file
         self.file_name_key = f"{file}_name"
         self.file_link_key = f"{file}_link"
         self.update_button_state()
     
+    def _has_file(self) -> bool:
+        return bool(self.data[self.file_link_key] and self.data[self.file_name_key])
+
     def update_button_state(self):
-        file_link = self.data[self.file_link_key]
-        if not file_link or not self.data[self.file_name_key]:
-            self.button.setEnabled(False)
-        else:
-            self.button.setEnabled(True)
+        # Una subida en la bandeja de salida aún no tiene enlace, pero se puede cancelar
+        self.button.setEnabled(self._has_file() or has_pending_upload(self.db_manager, self.data["id"], self.file))
     
     def connect(self, custom_func):
         self.custom_func = custom_func
 
     def delete_file(self):
-        if not self.data[self.file_link_key] or not self.data[self.file_name_key]:
+        has_file = self._has_file()
+        cancelled = cancel_drive_upload(self.db_manager, self.data["id"], self.file)
+        if not has_file and not cancelled:
             return
-        self.drive_service.delete_file(self.data[self.file_link_key])
+        if has_file:
+            # Se borra de Drive desde la bandeja de salida, también si no hay conexión
+            queue_drive_delete(self.db_manager, self.data[self.file_link_key])
         self.data[self.file_name_key] = ""
         self.data[self.file_link_key] = ""
         if self.custom_func is not None:
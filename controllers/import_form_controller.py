@@ -2,7 +2,6 @@ from PySide6.QtUiTools import QUiLoader
 from PySide6.QtCore import QFile, QIODevice, Qt, Slot
 from PySide6.QtWidgets import QDialog, QComboBox, QTableView, QPushButton
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
-from PySide6.QtCore import QSortFilterProxyModel
 from typing import Any
 
 import os
@@ -13,6 +12,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.import_manager import ImportManager
 from utils.db_manager import DbManager
 from utils.config import Config
+from utils import reachability
+from controllers.warning_dialog_controller import WarningDialogController
 
 
 _display_headers = [
@@ -28,10 +29,16 @@ _display_headers = [
     "mv_program_3", "mv_program_3_year",
 ]
 
+# Filas que se agregan a la vista en cada fetchMore
+_FETCH_BATCH_SIZE = 200
+
 class TableModel(QAbstractTableModel):
     def __init__(self, data: list[dict[str, Any]],  parent = None) -> None:
         super().__init__(parent)
         self._headers = _display_headers
+        # Columna y sentido del último orden, para ubicar los perfiles agregados
+        self._sort_key: str | None = None
+        self._sort_descending = False
         self.load_data(data)
         
         
@@ -43,22 +50,40 @@ class TableModel(QAbstractTableModel):
             self._headers.append(h)
     
     def load_data(self, data: list[dict[str, Any]]):
-        self._data = []
-        for item in data:
-            row = [item[h] for h in self._headers]
-            self._data.append(row)
+        """Usa la lista de perfiles sin copiarla; las filas se muestran por lotes con fetchMore."""
+        self.beginResetModel()
+        self._data = data
+        self._loaded_rows = min(len(data), _FETCH_BATCH_SIZE)
+        self.endResetModel()
     
     def data(self, index: QModelIndex, role):
         if role == Qt.DisplayRole:
             row = index.row()
             column = index.column()
-            return self._data[row][column]
+            return self._data[row][self._headers[column]]
 
     def rowCount(self, parent=QModelIndex()) -> int:
-        return len(self._data)
+        if parent.isValid():
+            return 0
+        return self._loaded_rows
 
     def columnCount(self, parent=QModelIndex()) -> int:
-        return len(self._data[0])
+        return len(self._headers)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._loaded_rows < len(self._data)
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid():
+            return
+        count = min(_FETCH_BATCH_SIZE, len(self._data) - self._loaded_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
 
     def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
@@ -67,10 +92,58 @@ class TableModel(QAbstractTableModel):
             if orientation == Qt.Vertical:
                 return section + 1
         return None
+
+    def _sort_value(self, profile: dict[str, Any]) -> str:
+        return str(profile.get(self._sort_key, ""))
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        """
+        Ordena la lista completa y no solo las filas ya mostradas; por eso la
+        vista usa este modelo directamente, sin QSortFilterProxyModel.
+        """
+        if column < 0 or column >= len(self._headers):
+            return
+        self._sort_key = self._headers[column]
+        self._sort_descending = order == Qt.DescendingOrder
+        self.beginResetModel()
+        self._data.sort(key=self._sort_value, reverse=self._sort_descending)
+        self.endResetModel()
+
+    def take_profile(self, row: int) -> dict[str, Any]:
+        """Quita el perfil de la fila indicada y lo devuelve."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        profile = self._data.pop(row)
+        self._loaded_rows -= 1
+        self.endRemoveRows()
+        return profile
+
+    def append_profile(self, profile: dict[str, Any]) -> None:
+        """
+        Agrega un perfil en la posición que le corresponde según el orden
+        actual; si cae entre las filas sin cargar se mostrará con fetchMore.
+        """
+        row = len(self._data)
+        if self._sort_key is not None:
+            value = self._sort_value(profile)
+            for i, item in enumerate(self._data):
+                item_value = self._sort_value(item)
+                if (item_value < value) if self._sort_descending else (item_value > value):
+                    row = i
+                    break
+        if row > self._loaded_rows:
+            self._data.insert(row, profile)
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._data.insert(row, profile)
+        self._loaded_rows += 1
+        self.endInsertRows()
     
     def clear(self):
+        self.beginResetModel()
         self._headers = []
         self._data = []
+        self._loaded_rows = 0
+        self.endResetModel()
 
 
 class ImportFormController(QDialog):
@@ -101,9 +174,15 @@ class ImportFormController(QDialog):
     def load_profiles(self) -> None:
         index = self.import_from.currentIndex()
         self.import_manager.set_import_form(index)
-        all_profiles = self.import_manager.get_form_profiles()
         self.no_imported_profiles = []
         self.already_imported_profiles = []
+        try:
+            all_profiles = self.import_manager.get_form_profiles()
+        except reachability.OfflineError as e:
+            print(f"[IMPORT_FORM] No se pudo leer el formulario: {e}")
+            WarningDialogController(self).show_warning_dialog("Advertencia",
+                "No se pudo leer el formulario. Verifique su conexión a internet")
+            return
         for p in all_profiles:
             if not p["id_document_type"] or not p["full_name"]:
                 continue
@@ -118,24 +197,19 @@ class ImportFormController(QDialog):
         selected_index = self.no_imported_table.selectionModel().currentIndex()
         if not selected_index.isValid():
             return None
-        original_index = self.no_imported_model_filter.mapToSource(selected_index)
-        return original_index.row()
+        return selected_index.row()
 
     def setup_table_views(self) -> None:
+        # Los modelos ordenan la lista completa, ver TableModel.sort
         self.no_imported_model = TableModel(self.no_imported_profiles)
-        self.no_imported_model_filter = QSortFilterProxyModel()
-        self.no_imported_model_filter.setSourceModel(self.no_imported_model)
-
         self.already_imported_model = TableModel(self.already_imported_profiles)
-        self.already_imported_model_filter = QSortFilterProxyModel()
-        self.already_imported_model_filter.setSourceModel(self.already_imported_model)
 
         self.no_imported_table: QTableView = self.form.noImportedTableView
-        self.no_imported_table.setModel(self.no_imported_model_filter)
+        self.no_imported_table.setModel(self.no_imported_model)
         self.no_imported_table.setSortingEnabled(True)
 
         self.already_imported_table: QTableView = self.form.alreadyImportedTableView
-        self.already_imported_table.setModel(self.already_imported_model_filter)
+        self.already_imported_table.setModel(self.already_imported_model)
         self.already_imported_table.setSortingEnabled(True)
     
     def setup_import_from(self) -> None:
@@ -165,11 +239,13 @@ class ImportFormController(QDialog):
     @Slot()
     def on_load_clicked(self) -> None:
         self.load.setEnabled(False)
-        self.load_profiles()
-        self.setup_table_views()
-        self.setup_sort_by()
-        self.setup_import_button()
-        self.load.setEnabled(True)
+        try:
+            self.load_profiles()
+            self.setup_table_views()
+            self.setup_sort_by()
+            self.setup_import_button()
+        finally:
+            self.load.setEnabled(True)
     
     def import_profile(self, profile: dict[str, str]) -> None:
         profile = profile.copy()
@@ -182,7 +258,7 @@ class ImportFormController(QDialog):
         profile["photo_name"] = ""
         profile["photo_link"] = profile["photo_link"]
 
-        self.db_manager.update_local_db_with_profile(profile)
+        self.import_manager.import_profile(profile)
     
     @Slot()
     def on_sort_by_changed(self) -> None:
@@ -191,12 +267,13 @@ class ImportFormController(QDialog):
     @Slot()
     def on_import_clicked(self) -> None:
         index = self.get_selected_no_imported_profile_index()
-        profile = self.no_imported_profiles.pop(index)
+        if index is None:
+            return
+        profile = self.no_imported_model.take_profile(index)
         new_tag = "NEW"
         if profile["tag"]:
             new_tag += "+"
         profile["tag"] = new_tag + profile["tag"]
         profile["_already_imported"] = True
-        self.already_imported_profiles.append(profile)
-        self.setup_table_views()
+        self.already_imported_model.append_profile(profile)
         self.import_profile(profile)
@@ -1,28 +1,39 @@
-from PySide6.QtCore import Slot, QItemSelectionModel, QRegularExpression
+from PySide6.QtCore import Signal, Slot, Qt, QItemSelectionModel, QRegularExpression, QThread, QTimer
 from PySide6.QtWidgets import QMainWindow, QComboBox
 from PySide6.QtGui import QIntValidator
-from models.profiles_table_model import ProfilesTableModel
+from models.profiles_table_model import ProfilesTableModel, PROFILE_COLUMNS
 from models.filtered_profiles_model import FilteredProfilesModel
-from utils.db_manager import DbManager
+from utils.db_manager import DbManager, TEXT_SEARCH_AVAILABLE, INDEXED_FIELDS
 from utils.config import Config
+from utils import outbox
+from utils.outbox import OutboxDrainer
 from utils.functions import normalize_string
 
-import os, sys
+import os, sys, time, json
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from controllers.profile_form_controller import ProfileFormController
 from controllers.warning_dialog_controller import WarningDialogController
 from controllers.import_form_controller import ImportFormController
 from controllers.message_box_controller import MessageBoxController
+from controllers.sync_worker import SyncWorker
+
+SHUTDOWN_SYNC_TIMEOUT = 10
+TEXT_SEARCH_LABEL = "Texto completo"
 
 class MainWindowController(QMainWindow):
     column_widths = [15, 140, 200, 40, 150, 200, 150, 150]
+    # Ids de perfiles que cambiaron en la base local, emitido desde cualquier hilo
+    profiles_changed = Signal(list)
 
-    def __init__(self, window, db_manager: DbManager, config: Config):
+    def __init__(self, window, db_manager: DbManager, config: Config, outbox_drainer: OutboxDrainer | None = None):
         super().__init__()
         self.window: QMainWindow = window
         self.window.setWindowTitle("Banco hojas de vida")
         self.db_manager = db_manager
         self.config = config
+        self.outbox_drainer = outbox_drainer
+        self.sync_thread = None
+        self.pending_profile_ids: set[int] = set()
         
         self.load_profiles()
         self.setup_table()
@@ -36,29 +47,91 @@ class MainWindowController(QMainWindow):
         self.setup_filter_by()
         self.adjust_column_widths()
         self.update_results_label()
+        self.setup_outbox_status()
+        self.setup_profile_notifications()
 
         self.window.show()
-        self.validate_remote_connection()
+        self.start_sync()
     
+    def fetch_table_rows(self) -> list[tuple]:
+        """Lee de la base solo las columnas que muestra la tabla."""
+        return list(self.db_manager.iter_columns(PROFILE_COLUMNS))
+
     def load_profiles(self) -> None:
-        profiles_data = self.db_manager.fetch_profiles()
+        profiles_data = self.fetch_table_rows()
         self.warning_dialog_controller = WarningDialogController(self.window)
         self.profiles_model = ProfilesTableModel(profiles_data)
         self.filtered_profiles_model = FilteredProfilesModel()
         self.filtered_profiles_model.setSourceModel(self.profiles_model)
         self.load_table_data()
     
-    def validate_remote_connection(self):
-        self.db_manager.gspreadsheet.restart_service()
-        if not self.db_manager.gspreadsheet.available:
-            self.warning_dialog_controller.show_warning_dialog("Advertencia",
-                "No se pudo establecer conexión de la base de datos remoto. Verifique su conexión a internet")
+    def show_connection_warning(self):
+        self.warning_dialog_controller.show_warning_dialog("Advertencia",
+            "No se pudo establecer conexión de la base de datos remoto. Verifique su conexión a internet")
+
+    def show_conflicts_warning(self, conflicts: list[dict]) -> None:
+        lines = []
+        for conflict in conflicts[:10]:
+            column = conflict["column"] or "perfil"
+            lines.append(f"{conflict['id']} - {column}: local \"{conflict['local']}\", nube \"{conflict['remote']}\"")
+        if len(conflicts) > 10:
+            lines.append(f"... y {len(conflicts) - 10} más")
+        self.warning_dialog_controller.show_warning_dialog("Conflictos de sincronización",
+            "Estos campos cambiaron tanto localmente como en la nube; se conservó el valor local.\n\n" + "\n".join(lines))
+
+    def start_sync(self) -> None:
+        """Sincroniza con la hoja maestra en un hilo aparte para no bloquear la ventana."""
+        if self.sync_thread is not None and self.sync_thread.isRunning():
+            return
+        self.window.syncPushButton.setEnabled(False)
+        self.window.syncStatusLabel.setText("Sincronizando...")
+        self.sync_thread = QThread()
+        self.sync_worker = SyncWorker(self.db_manager)
+        self.sync_worker.moveToThread(self.sync_thread)
+        self.sync_thread.started.connect(self.sync_worker.run)
+        self.sync_worker.progress.connect(self.window.syncStatusLabel.setText)
+        self.sync_worker.finished.connect(self.on_sync_finished)
+        self.sync_worker.failed.connect(self.on_sync_failed)
+        # Conexión directa: el hilo termina aunque la interfaz esté bloqueada en wait_for_sync
+        self.sync_worker.finished.connect(self.sync_thread.quit, Qt.DirectConnection)
+        self.sync_worker.failed.connect(self.sync_thread.quit, Qt.DirectConnection)
+        self.sync_thread.start()
+
+    def sync_in_progress(self) -> bool:
+        return self.sync_thread is not None and self.sync_thread.isRunning()
+
+    def wait_for_sync(self, timeout: float | None = None) -> bool:
+        """Espera la sincronización en curso; devuelve False si no terminó a tiempo."""
+        if not self.sync_in_progress():
+            return True
+        if timeout is None:
+            return self.sync_thread.wait()
+        return self.sync_thread.wait(int(max(timeout, 0) * 1000))
     
+    def setup_outbox_status(self):
+        if self.outbox_drainer is None:
+            return
+        # Fallidas ya avisadas, para avisar solo cuando aparecen nuevas
+        self.reported_failed_count = 0
+        self.outbox_timer = QTimer(self)
+        self.outbox_timer.timeout.connect(self.refresh_outbox_status)
+        self.outbox_timer.start(2000)
+        self.refresh_outbox_status()
+
+    def setup_profile_notifications(self):
+        # Los cambios llegan desde el hilo que escribió y se aplican en el de la interfaz
+        self.profiles_changed.connect(self.on_profiles_changed)
+        self.db_manager.add_listener(self.profiles_changed.emit)
+
     def setup_filter_by(self):
         columns = self.profiles_model.view_headers.values()
         self.filter_column = 1
         self.filter_combobox: QComboBox = self.window.filterByComboBox
         self.filter_combobox.addItems(columns)
+        # Busca en el perfil profesional, la experiencia y los estudios
+        self.text_search_index = self.filter_combobox.count() if TEXT_SEARCH_AVAILABLE else None
+        if TEXT_SEARCH_AVAILABLE:
+            self.filter_combobox.addItem(TEXT_SEARCH_LABEL)
         self.filter_combobox.setCurrentIndex(self.filter_column)
         self.filter_combobox.currentIndexChanged.connect(self.on_filter_selection_changed)
         self.window.filterSearchLineEdit.textChanged.connect(self.on_search_filter_text_changed)
@@ -116,7 +189,6 @@ class MainWindowController(QMainWindow):
             return
         self.profile_form = ProfileFormController(self.db_manager, profile_id)
         self.profile_form.show() 
-        self.profiles_model.update_data(self.db_manager.fetch_profiles())
     
 
     @Slot(QItemSelectionModel)
@@ -132,6 +204,7 @@ class MainWindowController(QMainWindow):
     def on_filter_selection_changed(self):
         index = self.filter_combobox.currentIndex()
         self.filter_column = index
+        self.on_search_filter_text_changed(self.window.filterSearchLineEdit.text())
 
     @Slot(str)
     def on_id_search_text_changed(self, text) -> None:
@@ -144,10 +217,37 @@ class MainWindowController(QMainWindow):
             index = self.filtered_profiles_model.index(0, 0)
             selection_model.select(index, QItemSelectionModel.Select | QItemSelectionModel.Rows)
     
+    def filter_field(self) -> str | None:
+        """Campo de la columna elegida para filtrar, None en la búsqueda de texto completo."""
+        if self.filter_column == self.text_search_index:
+            return None
+        return list(self.profiles_model.view_headers)[self.filter_column]
+
+    def apply_database_filter(self, text: str) -> bool:
+        """
+        Filtra con una consulta a la base cuando la columna elegida tiene
+        índice o es la búsqueda de texto completo. Devuelve False si no aplica.
+        """
+        field = self.filter_field()
+        if field is not None and field not in INDEXED_FIELDS:
+            return False
+        self.filtered_profiles_model.setFilterRegExColumn(QRegularExpression(), 0)
+        if not text.strip():
+            self.filtered_profiles_model.setFilterIds(None)
+        elif field is None:
+            self.filtered_profiles_model.setFilterIds(self.db_manager.search_profiles_text(text))
+            # Con el filtro por ids el orden es el de relevancia
+            self.window.profilesTableView.sortByColumn(0, Qt.AscendingOrder)
+        else:
+            self.filtered_profiles_model.setFilterIds(self.db_manager.find_profile_ids(field, text), ranked=False)
+        return True
+
     @Slot(str)
     def on_search_filter_text_changed(self, text) -> None:
-        filter_pattern = QRegularExpression(normalize_string(text), QRegularExpression.CaseInsensitiveOption)
-        self.filtered_profiles_model.setFilterRegExColumn(filter_pattern, self.filter_column)
+        if not self.apply_database_filter(text):
+            filter_pattern = QRegularExpression(normalize_string(text), QRegularExpression.CaseInsensitiveOption)
+            self.filtered_profiles_model.setFilterIds(None)
+            self.filtered_profiles_model.setFilterRegExColumn(filter_pattern, self.filter_column)
         selection_model = self.window.profilesTableView.selectionModel()
         selection_model.clearSelection()
         if self.filtered_profiles_model.rowCount() > 0:
@@ -163,8 +263,123 @@ class MainWindowController(QMainWindow):
     
     @Slot()
     def on_sync_button_clicked(self):
-        self.validate_remote_connection()
-        self.db_manager.synchronize()
+        self.start_sync()
+
+    @Slot(list)
+    def on_sync_finished(self, changed_ids: list) -> None:
+        self.window.syncPushButton.setEnabled(True)
+        if not self.db_manager.gspreadsheet.available:
+            self.window.syncStatusLabel.setText("Sin conexión")
+            self.show_connection_warning()
+            return
+        if not self.report_conflicts():
+            self.window.syncStatusLabel.setText("Sincronizado")
+
+    def report_conflicts(self) -> bool:
+        """
+        Muestra los conflictos de las sincronizaciones que aún no se han
+        mostrado, también los de la bandeja de salida. Devuelve True si había.
+        """
+        conflicts = self.db_manager.take_conflicts()
+        if not conflicts:
+            return False
+        self.window.syncStatusLabel.setText(f"Sincronizado con {len(conflicts)} conflictos")
+        self.show_conflicts_warning(conflicts)
+        return True
+
+    @Slot(list)
+    def on_profiles_changed(self, ids: list) -> None:
+        # Se juntan los avisos seguidos, por ejemplo al importar varios perfiles
+        if not self.pending_profile_ids:
+            QTimer.singleShot(0, self.flush_profile_changes)
+        self.pending_profile_ids.update(ids)
+
+    def flush_profile_changes(self) -> None:
+        ids, self.pending_profile_ids = list(self.pending_profile_ids), set()
+        self.refresh_profiles(ids)
+
+    def refresh_profiles(self, changed_ids: list[int]) -> None:
+        """Actualiza en la tabla solo los perfiles indicados."""
+        if not changed_ids:
+            return
+        profiles = self.db_manager.get_profiles_by_ids(changed_ids)
+        # Los ids que ya no existen fueron eliminados
+        removed_ids = set(changed_ids) - {profile["id"] for profile in profiles}
+        self.profiles_model.update_profiles(profiles)
+        self.profiles_model.remove_profiles(removed_ids)
+        if self.window.filterSearchLineEdit.text().strip():
+            # Los resultados de la búsqueda pueden haber cambiado con los perfiles
+            self.apply_database_filter(self.window.filterSearchLineEdit.text())
+        self.update_results_label()
+
+    @Slot()
+    def refresh_outbox_status(self) -> None:
+        stats = self.outbox_drainer.stats()
+        if stats["depth"]:
+            text = f"Pendientes: {stats['depth']}"
+        else:
+            text = "Sin pendientes"
+        if stats["failed"]:
+            text += f", fallidos: {stats['failed']}"
+        self.window.outboxStatusLabel.setText(text)
+        self.window.outboxStatusLabel.setToolTip(
+            f"Cambios enviados: {stats['drained_total']}\nÚltimo envío: {stats['throughput']:.1f} cambios/s")
+        # Las sincronizaciones de la bandeja de salida no pasan por on_sync_finished
+        if not self.sync_in_progress():
+            self.report_conflicts()
+        if stats["failed"] > self.reported_failed_count:
+            self.reported_failed_count = stats["failed"]
+            self.show_failed_outbox_warning()
+        elif stats["failed"] < self.reported_failed_count:
+            self.reported_failed_count = stats["failed"]
+
+    def show_failed_outbox_warning(self) -> None:
+        entries = self.db_manager.get_failed_outbox_entries()
+        if not entries:
+            return
+        lines = []
+        for entry in entries[:10]:
+            payload = json.loads(entry["payload"]) if entry["payload"] else {}
+            if entry["operation"] == "upload_file":
+                action = f"Subir {payload.get('file_name', '')} (perfil {payload.get('profile_id', '')})"
+            elif entry["operation"] == "delete_file":
+                action = f"Eliminar {payload.get('file_url', '')}"
+            else:
+                action = entry["key"]
+            lines.append(f"{action}: {entry['last_error']}")
+        if len(entries) > 10:
+            lines.append(f"... y {len(entries) - 10} más")
+        MessageBoxController(self.window, "Cambios sin enviar",
+            "Estos cambios no se pudieron enviar a Drive después de varios intentos:\n\n" + "\n".join(lines)
+            + "\n\n¿Desea reintentarlos?", lambda: self.retry_failed_outbox(entries))
+
+    def retry_failed_outbox(self, entries: list[dict]) -> None:
+        self.db_manager.retry_outbox([entry["id"] for entry in entries])
+        self.reported_failed_count = 0
+        outbox.notify()
+        self.refresh_outbox_status()
+
+    @Slot(str)
+    def on_sync_failed(self, message: str) -> None:
+        self.window.syncPushButton.setEnabled(True)
+        self.window.syncStatusLabel.setText("Error al sincronizar")
+
+    @Slot()
+    def on_about_to_quit(self) -> None:
+        # Los últimos cambios se envían con un tiempo límite; lo que no alcance
+        # queda en la bandeja de salida para el próximo inicio
+        timeout = self.config.get("SHUTDOWN_SYNC_TIMEOUT") or SHUTDOWN_SYNC_TIMEOUT
+        deadline = time.monotonic() + timeout
+        remaining = lambda: deadline - time.monotonic()
+        self.db_manager.remove_listener(self.profiles_changed.emit)
+        if self.outbox_drainer is not None:
+            self.outbox_drainer.stop(remaining())
+        # Con el hilo de sincronización bien cerrado solo se espera lo que tarde la red
+        if not self.wait_for_sync(remaining()):
+            print(f"[MAIN_WINDOW] La sincronización en curso superó {timeout} s, "
+                  "los cambios pendientes se enviarán en el próximo inicio")
+            return
+        self.db_manager.push_pending(remaining())
     
     @Slot()
     def on_see_profile_button_clicked(self):
@@ -180,8 +395,6 @@ class MainWindowController(QMainWindow):
         if profile_id is None:
             return
         self.db_manager.delete_profile_by_id(int(profile_id))
-        self.load_profiles()
-        self.update_results_label()
     
     @Slot()
     def on_delete_profile_button_clicked(self):
@@ -201,5 +414,3 @@ class MainWindowController(QMainWindow):
     def on_import_button_clicked(self) -> None:
         import_manager = ImportFormController(self.db_manager, self.config)
         import_manager.show()
-        self.load_profiles()
-        self.update_results_label()
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import QDialog, QComboBox, QLineEdit, QFrame, QLabel
 from utils.config import Config
 from utils.drive_service import DriveService
 from utils.functions import get_option, match, open_link, gen_list_of_years
-from utils.db_manager import DbManager
+from utils.db_manager import DbManager, SHEET_COLUMNS
 from models.observable_dict import ObservableDict
 
 import os
@@ -13,6 +13,10 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from controllers.fields_controller import DeleteFilePushButtonController, ImportPushButtonController, LineEditController, PlainPushButtonController, PlainTextEditController, ComboBoxController, CheckBoxesFrameController, PlaceComboBoxesController, RadioButtonsFrameController, DateEditController, GraphicsViewController
 from controllers.message_box_controller import MessageBoxController
 
+# Se guardan al importar o eliminar el archivo (update_files) y la bandeja de
+# salida los completa en segundo plano, por eso el botón guardar no los escribe
+FILE_FIELDS = ("photo_name", "photo_link", "resume_name", "resume_link")
+
 class ProfileFormController(QDialog):
     def __init__(self, db_manager: DbManager, id: int) -> None:
         super().__init__()
@@ -86,25 +90,27 @@ class ProfileFormController(QDialog):
         self.form.seeLinkedInPushButton.clicked.connect(lambda : open_link(self.data["linkedin"]))
     
     def setup_import_file_buttons(self) -> None:
-        self.import_photo = ImportPushButtonController(self.drive_service, self.form.importPhotoPushButton, self.data, "photo")
+        self.import_photo = ImportPushButtonController(self.drive_service, self.db_manager, self.form.importPhotoPushButton, self.data, "photo")
         self.import_photo.connect(self.reload_photo)
-        self.import_resume = ImportPushButtonController(self.drive_service, self.form.importCVPushButton, self.data, "resume")
+        self.import_resume = ImportPushButtonController(self.drive_service, self.db_manager, self.form.importCVPushButton, self.data, "resume")
         self.import_resume.connect(self.reload_resume)
     
     def setup_delete_file_buttons(self) -> None:
-        self.delete_photo = DeleteFilePushButtonController(self.drive_service, self.form.deletePhotoPushButton, self.data, "photo")
+        self.delete_photo = DeleteFilePushButtonController(self.drive_service, self.db_manager, self.form.deletePhotoPushButton, self.data, "photo")
         self.delete_photo.connect(self.reload_photo)
-        self.delete_resume = DeleteFilePushButtonController(self.drive_service, self.form.deleteCVPushButton, self.data, "resume")
+        self.delete_resume = DeleteFilePushButtonController(self.drive_service, self.db_manager, self.form.deleteCVPushButton, self.data, "resume")
         self.delete_resume.connect(self.reload_resume)
     
     def reload_resume(self) -> None:
         self.setup_buttons()
+        self.delete_resume.update_button_state()
         self.update_files()
 
     def reload_photo(self) -> None:
         self.photo.destroy()
         self.photo = GraphicsViewController(self.form.photoGraphicsView, self.data, "photo_link")
         self.setup_buttons()
+        self.delete_photo.update_button_state()
         self.update_files()
 
     def show(self) -> None:
@@ -216,7 +222,8 @@ class ProfileFormController(QDialog):
 
     def data_changed_callback(self) -> None:
         is_equal = True
-        for k in self.original_data:
+        # Las columnas locales (revisión, hash, búsqueda) cambian al guardar
+        for k in SHEET_COLUMNS:
             if self.data[k] != self.original_data[k]:
                 is_equal = False
                 break
@@ -238,12 +245,9 @@ class ProfileFormController(QDialog):
             event.accept()
     
     def update_files(self):
-        self.original_data["photo_name"] = self.data["photo_name"]
-        self.original_data["resume_name"] = self.data["resume_name"]
-        self.original_data["photo_link"] = self.data["photo_link"]
-        self.original_data["resume_link"] = self.data["resume_link"]
-        self.db_manager.update_local_db_with_profile(self.data)
-        self.original_data = self.db_manager.get_profile_by_id(self.id).copy()
+        files = {key: self.data[key] for key in FILE_FIELDS}
+        self.original_data.update(files)
+        self.db_manager.update_local_db_with_profile({"id": self.id, **files})
         self.data_changed_callback()
     
     @Slot(QDate)
@@ -270,6 +274,7 @@ class ProfileFormController(QDialog):
     @Slot()
     def on_save_changes_clicked(self) -> None:
         self.saved = True
-        self.db_manager.update_local_db_with_profile(self.data)
+        self.db_manager.update_local_db_with_profile({k: v for k, v in self.data.items() if k not in FILE_FIELDS})
         self.original_data = self.db_manager.get_profile_by_id(self.id).copy()
-        self.data_changed_callback()
\ No newline at end of file
+        # Los archivos pueden haber cambiado desde que se abrió el formulario
+        self.data.update({key: self.original_data[key] for key in FILE_FIELDS})
\ No newline at end of file
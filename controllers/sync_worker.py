@@ -0,0 +1,26 @@
+from PySide6.QtCore import QObject, Signal, Slot
+
+from utils.db_manager import DbManager
+from utils import reachability
+
+
+class SyncWorker(QObject):
+    progress = Signal(str)
+    finished = Signal(list)  # Ids de los perfiles que cambiaron en la base local
+    failed = Signal(str)
+
+    def __init__(self, db_manager: DbManager) -> None:
+        super().__init__()
+        self.db_manager = db_manager
+
+    @Slot()
+    def run(self) -> None:
+        try:
+            # Fuera del hilo de la interfaz se puede esperar una comprobación reciente
+            reachability.monitor.check()
+            changed_ids = self.db_manager.synchronize(self.progress.emit)
+        except Exception as e:
+            print(f"[SYNC_WORKER] Error al sincronizar: {e}")
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(changed_ids)
@@ -1,9 +1,6 @@
 import sys
 import os
-from utils.config import Config
-from utils.db_manager import DbManager
-from utils.gspreadsheet import GSpreadSheet
-from controllers.main_window_controller import MainWindowController
+import multiprocessing
 
 from PySide6 import QtCore
 from PySide6.QtUiTools import QUiLoader
@@ -22,6 +19,15 @@ def show_error_dialog(message: str):
         sys.exit()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    # Se importan aquí para que los procesos del pool de importación, que
+    # vuelven a cargar este archivo, no abran la base local
+    from utils.config import Config
+    from utils.db_manager import DbManager
+    from utils.gspreadsheet import GSpreadSheet
+    from utils.outbox import OutboxDrainer
+    from controllers.main_window_controller import MainWindowController
+
     config = Config()
     db_manager = DbManager()
 
@@ -34,7 +40,7 @@ if __name__ == "__main__":
     range_name = config.get("MASTER_SHEET_RANGE")
     master_sheet = GSpreadSheet(sheet_id, range_name, readonly=False)
     db_manager.set_gspreadsheet(master_sheet)
-    db_manager.synchronize()
+    outbox_drainer = OutboxDrainer(db_manager, config)
 
     QCoreApplication.setAttribute(QtCore.Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
@@ -62,7 +68,16 @@ if __name__ == "__main__":
         print(loader.errorString())
         sys.exit(-1)
 
-    controller = MainWindowController(window, db_manager, config)
-    app.aboutToQuit.connect(db_manager.synchronize)
+    controller = MainWindowController(window, db_manager, config, outbox_drainer)
+    outbox_drainer.start()
+    app.aboutToQuit.connect(controller.on_about_to_quit)
 
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if controller.sync_in_progress():
+        # Qt aborta si se destruye un QThread en ejecución; la sincronización
+        # interrumpida se repite en el próximo inicio. Solo pasa si una llamada a la
+        # red no respondió dentro de SHUTDOWN_SYNC_TIMEOUT
+        print("[MAIN] Cerrando con una sincronización sin terminar")
+        sys.stdout.flush()
+        os._exit(exit_code)
+    sys.exit(exit_code)
@@ -1,12 +1,16 @@
 from PySide6.QtCore import QSortFilterProxyModel, QRegularExpression, Qt
 
 from utils.functions import normalize_string
+from models.profiles_table_model import NORMALIZED_ROLE
 
 class FilteredProfilesModel(QSortFilterProxyModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.filter_column = 0
         self.filer_role = Qt.DisplayRole
+        # Posición de cada id en los resultados de la búsqueda en la base
+        self._id_ranks: dict[str, int] | None = None
+        self._ranked = False
 
     def setFilterColumn(self, column: int):
         self.filter_column = column
@@ -20,12 +24,33 @@ class FilteredProfilesModel(QSortFilterProxyModel):
         self.setFilterRegularExpression(expression)
         self.setFilterKeyColumn(column)
 
+    def setFilterIds(self, ids: list[int] | None, ranked: bool = True):
+        """
+        Muestra solo los perfiles con los ids indicados; con `ranked` se ordenan
+        como en la lista. None quita el filtro y vuelve al orden de la columna elegida.
+        """
+        self._id_ranks = None if ids is None else {str(id): rank for rank, id in enumerate(ids)}
+        self._ranked = ranked
+        self.invalidate()
+
+    def lessThan(self, source_left, source_right):
+        if self._id_ranks is None or not self._ranked:
+            return super().lessThan(source_left, source_right)
+        source_model = self.sourceModel()
+        left = self._id_ranks.get(source_model.index(source_left.row(), 0).data(), len(self._id_ranks))
+        right = self._id_ranks.get(source_model.index(source_right.row(), 0).data(), len(self._id_ranks))
+        return left < right
+
     def filterAcceptsRow(self, source_row, source_parent):
+        source_model = self.sourceModel()
+        if self._id_ranks is not None and source_model.index(source_row, 0, source_parent).data() not in self._id_ranks:
+            return False
         regex = self.filterRegularExpression()
         if not regex.pattern():
             return True
-        source_model = self.sourceModel()
         index = source_model.index(source_row, self.filter_column, source_parent)
-        value = source_model.data(index, self.filer_role) # Valor de la celda
-        matches = regex.match(normalize_string(str(value)))
+        value = source_model.data(index, NORMALIZED_ROLE) # Valor normalizado de la celda
+        if value is None:
+            value = normalize_string(str(source_model.data(index, self.filer_role)))
+        matches = regex.match(value)
         return matches.hasMatch()
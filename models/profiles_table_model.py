@@ -1,6 +1,8 @@
 from PySide6.QtCore import QAbstractTableModel, Qt, QModelIndex
-from typing import Any
-from utils.functions import calc_age
+from typing import Any, Sequence
+from utils.functions import calc_age, normalize_strings
+
+NORMALIZED_ROLE = Qt.UserRole + 1
 
 _view_headers = {
     "id": "Id",
@@ -17,42 +19,86 @@ _view_headers = {
     "mv_program_3": "Programa Manos Visibles 3",
 }
 
+# Columnas que se leen de la base para llenar la tabla, en este orden
+PROFILE_COLUMNS = [k for k in _view_headers if k != "age"] + ["birth_date"]
+_column_indexes = [None if k == "age" else PROFILE_COLUMNS.index(k) for k in _view_headers]
+_birth_date_index = PROFILE_COLUMNS.index("birth_date")
+
+
+def profile_values(profile: dict[str, Any]) -> tuple:
+    """Valores de un perfil en el orden de PROFILE_COLUMNS."""
+    return tuple(profile[c] for c in PROFILE_COLUMNS)
+
 
 class ProfilesTableModel(QAbstractTableModel):
-    def __init__(self, data: list[dict[str,Any]], parent=None) -> None:
+    def __init__(self, data: list[Sequence[Any]], parent=None) -> None:
+        """`data` son filas con los valores de PROFILE_COLUMNS."""
         super().__init__(parent)
         self.view_headers = _view_headers
         self.original_data = data
         self._headers = list(_view_headers.values())
         self.load_data()
         
+    def _make_row(self, item: Sequence[Any]) -> list[str]:
+        return [calc_age(item[_birth_date_index]) if i is None else str(item[i]) for i in _column_indexes]
+
     def load_data(self):
-        self._data = []
-        for item in self.original_data:
-            row = []
-            for k in _view_headers:
-                if k == "age":
-                    value = calc_age(item["birth_date"])
-                else:
-                    value = str(item[k])
-                row.append(value)
-            self._data.append(row)
+        self._data = [self._make_row(item) for item in self.original_data]
+        # Valores normalizados por columna, usados por el filtro de búsqueda
+        normalized_columns = [normalize_strings(column) for column in zip(*self._data)]
+        self._normalized = [list(row) for row in zip(*normalized_columns)]
     
     def update_data(self, new_data):
+        self.beginResetModel()
         self.original_data = new_data
         self.load_data()
+        self.endResetModel()
+
+    def update_profiles(self, profiles: list[dict[str, Any]]) -> None:
+        """Actualiza las filas de los perfiles indicados y agrega al final los que no estaban."""
+        id_column = list(_view_headers).index("id")
+        rows_by_id = {row[id_column]: i for i, row in enumerate(self._data)}
+        new_rows = []
+        for item in profiles:
+            row = self._make_row(profile_values(item))
+            index = rows_by_id.get(row[id_column])
+            if index is None:
+                new_rows.append(row)
+                continue
+            self._data[index] = row
+            self._normalized[index] = normalize_strings(row)
+            self.dataChanged.emit(self.index(index, 0), self.index(index, self.columnCount() - 1))
+        if new_rows:
+            first = len(self._data)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            self._data.extend(new_rows)
+            self._normalized.extend(normalize_strings(row) for row in new_rows)
+            self.endInsertRows()
+
+    def remove_profiles(self, ids: list[int]) -> None:
+        """Quita de la tabla las filas de los perfiles indicados."""
+        id_column = list(_view_headers).index("id")
+        ids = {str(id) for id in ids}
+        rows = [i for i, row in enumerate(self._data) if row[id_column] in ids]
+        for i in reversed(rows):
+            self.beginRemoveRows(QModelIndex(), i, i)
+            del self._data[i]
+            del self._normalized[i]
+            self.endRemoveRows()
     
     def data(self, index: QModelIndex, role):
         if role == Qt.DisplayRole:
             row = index.row()
             column = index.column()
             return self._data[row][column]
+        if role == NORMALIZED_ROLE:
+            return self._normalized[index.row()][index.column()]
 
     def rowCount(self, parent=QModelIndex()) -> int:
         return len(self._data)
 
     def columnCount(self, parent=QModelIndex()) -> int:
-        return len(self._data[0])
+        return len(self._headers)
 
     def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.DisplayRole):
         if role == Qt.DisplayRole:
@@ -0,0 +1,79 @@
+"""
+Compara la carga de la hoja maestra en la base local fila por fila con Pony
+(el método anterior de DbManager) contra bulk_upsert.
+
+Uso: python scripts/benchmark_bulk_load.py [filas]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from pony.orm import Database, Optional, PrimaryKey, db_session
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.bulk_loader import bulk_upsert
+
+COLUMN_COUNT = 57
+COLUMNS = ["id"] + [f"column_{i}" for i in range(1, COLUMN_COUNT + 1)]
+
+def make_rows(count: int, seed: int = 0) -> list[dict[str, str]]:
+    rng = random.Random(seed)
+    words = ["Si", "No", "Bogotá", "Antioquia", "Ingeniería", "Maestría", "Mujer", "Hombre", ""]
+    return [{c: str(i) if c == "id" else rng.choice(words) for c in COLUMNS} for i in range(1, count + 1)]
+
+def change_rows(rows: list[dict[str, str]], fraction: float, seed: int = 1) -> list[dict[str, str]]:
+    rng = random.Random(seed)
+    changed = [dict(row) for row in rows]
+    for row in rng.sample(changed, int(len(changed) * fraction)):
+        row[rng.choice(COLUMNS[1:])] = "Cambiado"
+    return changed
+
+def make_pony_db(file_path: str):
+    db = Database()
+    attributes = {"id": PrimaryKey(int, auto=True)}
+    attributes.update({c: Optional(str) for c in COLUMNS[1:]})
+    entity = type("Profile", (db.Entity,), attributes)
+    db.bind(provider='sqlite', filename=file_path, create_db=True)
+    db.generate_mapping(create_tables=True)
+    return db, entity
+
+def pony_load(entity, rows: list[dict[str, str]]) -> None:
+    with db_session:
+        for item in rows:
+            profile = entity.get(id=item.get('id'))
+            if not profile:
+                entity(**item)
+            else:
+                for key, value in item.items():
+                    setattr(profile, key, value)
+
+def measure(label: str, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed:8.2f} s")
+    return elapsed
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rows = make_rows(count)
+    changed = change_rows(rows, 0.1)
+    print(f"{count} filas sintéticas, {COLUMN_COUNT} columnas\n")
+    with tempfile.TemporaryDirectory() as directory:
+        pony_file = os.path.join(directory, "pony.sqlite")
+        _, entity = make_pony_db(pony_file)
+        pony_empty = measure("Pony, base vacía", lambda: pony_load(entity, rows))
+        pony_update = measure("Pony, 10% de filas cambiadas", lambda: pony_load(entity, changed))
+
+        bulk_file = os.path.join(directory, "bulk.sqlite")
+        make_pony_db(bulk_file)
+        bulk_empty = measure("bulk_upsert, base vacía", lambda: bulk_upsert(bulk_file, "Profile", COLUMNS, rows))
+        bulk_update = measure("bulk_upsert, 10% de filas cambiadas", lambda: bulk_upsert(bulk_file, "Profile", COLUMNS, changed))
+
+    print(f"\nAceleración base vacía: {pony_empty / bulk_empty:.1f}x")
+    print(f"Aceleración actualización: {pony_update / bulk_update:.1f}x")
+
+if __name__ == "__main__":
+    main()
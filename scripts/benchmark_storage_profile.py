@@ -0,0 +1,161 @@
+"""
+Mide lecturas y escrituras concurrentes sobre una base como la local con los
+ajustes por defecto de SQLite (diario de reversión, synchronous=FULL) y con
+el perfil de utils/storage_profile.py. Un hilo simula la sincronización
+(cargas con bulk_upsert), otro el guardado de perfiles uno a uno y varios
+hilos leen como la tabla principal y el diálogo de importación.
+
+Uso: python scripts/benchmark_storage_profile.py [filas] [segundos] [lectores]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+import threading
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.bulk_loader import _bulk_upsert
+from utils.storage_profile import get_pragmas
+
+COLUMN_COUNT = 57
+COLUMNS = ["id"] + [f"column_{i}" for i in range(1, COLUMN_COUNT + 1)]
+DEFAULT_PRAGMAS = [("journal_mode", "DELETE"), ("synchronous", "FULL"), ("busy_timeout", 5000)]
+SYNC_BATCH = 2_000
+
+def make_rows(count: int, seed: int = 0) -> list[dict[str, str]]:
+    rng = random.Random(seed)
+    words = ["Si", "No", "Bogotá", "Antioquia", "Ingeniería", "Maestría", "Mujer", "Hombre", ""]
+    return [{c: str(i) if c == "id" else rng.choice(words) for c in COLUMNS} for i in range(1, count + 1)]
+
+def connect(file_path: str, pragmas: list[tuple[str, object]]) -> sqlite3.Connection:
+    connection = sqlite3.connect(file_path, check_same_thread=False)
+    for name, value in pragmas:
+        connection.execute(f"PRAGMA {name} = {value}")
+    return connection
+
+def create_db(file_path: str, rows: list[dict[str, str]], pragmas: list[tuple[str, object]]) -> None:
+    connection = connect(file_path, pragmas)
+    columns = ", ".join(f'"{c}" TEXT' for c in COLUMNS[1:])
+    connection.execute(f'CREATE TABLE "Profile" ("id" INTEGER PRIMARY KEY, {columns})')
+    with connection:
+        _bulk_upsert(connection, "Profile", COLUMNS, rows, "id")
+    connection.close()
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run(file_path: str, rows: list[dict[str, str]], pragmas: list[tuple[str, object]], seconds: float, readers: int) -> dict[str, float]:
+    stop = threading.Event()
+    read_latencies: list[list[float]] = [[] for _ in range(readers)]
+    save_latencies: list[float] = []
+    sync_latencies: list[float] = []
+    errors: list[str] = []
+
+    def sync_writer():
+        connection = connect(file_path, pragmas)
+        rng = random.Random(1)
+        while not stop.is_set():
+            start_id = rng.randint(1, max(1, len(rows) - SYNC_BATCH))
+            batch = [dict(row, column_1=str(rng.random())) for row in rows[start_id - 1:start_id - 1 + SYNC_BATCH]]
+            start = time.perf_counter()
+            try:
+                with connection:
+                    _bulk_upsert(connection, "Profile", COLUMNS, batch, "id")
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            sync_latencies.append(time.perf_counter() - start)
+        connection.close()
+
+    def profile_saver():
+        connection = connect(file_path, pragmas)
+        rng = random.Random(2)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with connection:
+                    connection.execute('UPDATE "Profile" SET "column_2" = ? WHERE "id" = ?', (str(rng.random()), rng.randint(1, len(rows))))
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            save_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+        connection.close()
+
+    def reader(index: int):
+        connection = connect(file_path, pragmas)
+        rng = random.Random(10 + index)
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.1:
+                    # Recorrido completo, como al cargar la tabla principal
+                    connection.execute('SELECT "id", "column_1", "column_2", "column_3" FROM "Profile"').fetchall()
+                else:
+                    connection.execute('SELECT * FROM "Profile" WHERE "id" = ?', (rng.randint(1, len(rows)),)).fetchone()
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+            read_latencies[index].append(time.perf_counter() - start)
+        connection.close()
+
+    threads = [threading.Thread(target=sync_writer), threading.Thread(target=profile_saver)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    reads = [latency for latencies in read_latencies for latency in latencies]
+    return {
+        "reads": len(reads) / seconds,
+        "read_p50": statistics.median(reads) if reads else 0.0,
+        "read_p99": percentile(reads, 0.99),
+        "read_max": max(reads, default=0.0),
+        "saves": len(save_latencies) / seconds,
+        "save_p99": percentile(save_latencies, 0.99),
+        "syncs": len(sync_latencies) / seconds,
+        "sync_mean": statistics.mean(sync_latencies) if sync_latencies else 0.0,
+        "errors": len(errors),
+    }
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    rows = make_rows(count)
+    profiles = [("SQLite por defecto", DEFAULT_PRAGMAS), ("Perfil de almacenamiento", get_pragmas())]
+    print(f"{count} filas sintéticas, {seconds:.0f} s por prueba, {readers} lectores\n")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for i, (label, pragmas) in enumerate(profiles):
+            file_path = os.path.join(directory, f"profile_{i}.sqlite")
+            create_db(file_path, rows, pragmas)
+            results[label] = run(file_path, rows, pragmas, seconds, readers)
+
+    print(f"{'':<28}" + "".join(f"{label:>28}" for label in results))
+    lines = [
+        ("Lecturas por segundo", "reads", "{:.0f}"),
+        ("Lectura p50 (ms)", "read_p50", "ms"),
+        ("Lectura p99 (ms)", "read_p99", "ms"),
+        ("Lectura máxima (ms)", "read_max", "ms"),
+        ("Guardados por segundo", "saves", "{:.1f}"),
+        ("Guardado p99 (ms)", "save_p99", "ms"),
+        ("Cargas por segundo", "syncs", "{:.2f}"),
+        ("Carga promedio (ms)", "sync_mean", "ms"),
+        ("Errores de bloqueo", "errors", "{:.0f}"),
+    ]
+    for title, key, fmt in lines:
+        values = []
+        for result in results.values():
+            value = result[key]
+            values.append(f"{value * 1000:.2f}" if fmt == "ms" else fmt.format(value))
+        print(f"{title:<28}" + "".join(f"{value:>28}" for value in values))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Comprueba que normalize_string y normalize_strings de utils/functions.py dan
+el mismo resultado que la implementación anterior (NFD, quitar marcas
+diacríticas y filtrar con una expresión regular) para cada punto de código
+del plano multilingüe básico y para cadenas aleatorias.
+
+Uso: python scripts/check_normalize_string.py [cadenas] [semilla]
+"""
+import os
+import re
+import sys
+import random
+import unicodedata
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.functions import normalize_string, normalize_strings
+
+BMP_SIZE = 0x10000
+MAX_LENGTH = 40
+MAX_REPORTED = 20
+# Texto típico de los formularios, mezclado con caracteres de todo el plano
+COMMON_CHARS = "aáàäâãbcçdeéèëêfghiíìïîjklmnñoóòöôõpqrstuúùüûvwxyzAÁÉÍÓÚÑÜ0123456789 .,;:-_/()'\"\t\n"
+
+def reference_normalize_string(text: str) -> str:
+    """Implementación anterior de normalize_string."""
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    return re.sub(r'[^a-z0-9\s]', '', text.lower()).strip()
+
+def random_strings(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    strings = []
+    for _ in range(count):
+        length = rng.randint(0, MAX_LENGTH)
+        strings.append(''.join(
+            rng.choice(COMMON_CHARS) if rng.random() < 0.7 else chr(rng.randrange(BMP_SIZE))
+            for _ in range(length)))
+    return strings
+
+def compare(texts: list[str]) -> list[tuple[str, str, str]]:
+    mismatches = []
+    batch = normalize_strings(texts)
+    for text, value in zip(texts, batch):
+        expected = reference_normalize_string(text)
+        single = normalize_string(text)
+        if single != expected or value != expected:
+            mismatches.append((text, expected, single if single != expected else value))
+    return mismatches
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    code_points = [chr(c) for c in range(BMP_SIZE)]
+    mismatches = compare(code_points)
+    print(f"Puntos de código comparados: {len(code_points)}, diferencias: {len(mismatches)}")
+
+    strings = random_strings(count, seed)
+    string_mismatches = compare(strings)
+    print(f"Cadenas aleatorias comparadas: {len(strings)}, diferencias: {len(string_mismatches)}")
+
+    mismatches += string_mismatches
+    for text, expected, value in mismatches[:MAX_REPORTED]:
+        print(f"  {text!r}: se esperaba {expected!r}, se obtuvo {value!r}")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
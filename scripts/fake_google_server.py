@@ -0,0 +1,431 @@
+"""
+Servidor HTTP local que imita la parte de las APIs de Google que usa el
+proyecto: los valores de Sheets v4 (get, update, batchUpdate, batchClear,
+clear y spreadsheets.get para el número de filas) y los archivos de Drive v3
+(get, get_media, list, copy, delete y subidas simples o reanudables).
+
+Para usarlo se configura en config.txt:
+    GOOGLE_API_ENDPOINT = "http://127.0.0.1:8089"
+
+Uso: python scripts/fake_google_server.py [--port 8089] [--latency-ms 50]
+        [--jitter-ms 20] [--quota-per-minute 60] [--error-rate 0.01]
+        [--master-sheet-id ID] [--master-rows 5000]
+        [--form-sheet-id ID] [--form-rows 5000] [--drive-files 100]
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.gspreadsheet import _CELLS_PATTERN, _column_index
+from utils.sheet_columns import SHEET_COLUMNS
+
+DEFAULT_SHEET_NAME = "Hoja 1"
+DEFAULT_ROW_COUNT = 1000
+FORM_COLUMN_COUNT = 115
+
+
+class Spreadsheet:
+    """Hojas de un libro como listas de filas de texto."""
+    def __init__(self) -> None:
+        self.sheets: dict[str, list[list[str]]] = {}
+
+    def grid(self, sheet_name: str) -> list[list[str]]:
+        if not sheet_name:
+            sheet_name = next(iter(self.sheets), DEFAULT_SHEET_NAME)
+        return self.sheets.setdefault(sheet_name, [])
+
+    def row_count(self, sheet_name: str) -> int:
+        return max(DEFAULT_ROW_COUNT, len(self.grid(sheet_name)))
+
+
+def parse_range(range_name: str) -> tuple[str, int, int, int | None, int | None]:
+    """Devuelve (hoja, columna inicial, fila inicial, columna final, fila final), base 1."""
+    sheet_name, cells = range_name, ""
+    if "!" in range_name:
+        sheet_name, cells = range_name.rsplit("!", 1)
+    elif _CELLS_PATTERN.match(range_name) and any(c.isdigit() for c in range_name):
+        sheet_name, cells = "", range_name
+    if sheet_name.startswith("'") and sheet_name.endswith("'"):
+        sheet_name = sheet_name[1:-1].replace("''", "'")
+    match = _CELLS_PATTERN.match(cells) if cells else None
+    if not match:
+        return sheet_name, 1, 1, None, None
+    start_column, start_row, end_column, end_row = match.groups()
+    first_column = _column_index(start_column) if start_column else 1
+    if end_column is None:
+        # Una sola celda, p. ej. "B2"
+        last_column = first_column if start_column else None
+        end_row = start_row if start_row else None
+    else:
+        last_column = _column_index(end_column) if end_column else None
+    return (sheet_name, first_column, int(start_row) if start_row else 1,
+            last_column, int(end_row) if end_row else None)
+
+
+def _trim(rows: list[list[str]]) -> list[list[str]]:
+    """Quita las celdas y filas vacías al final, igual que la API."""
+    trimmed = []
+    for row in rows:
+        end = len(row)
+        while end and row[end - 1] == "":
+            end -= 1
+        trimmed.append(row[:end])
+    while trimmed and not trimmed[-1]:
+        trimmed.pop()
+    return trimmed
+
+
+class FakeGoogleState:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.lock = threading.Lock()
+        self.spreadsheets: dict[str, Spreadsheet] = {}
+        self.files: dict[str, dict] = {}
+        self.uploads: dict[str, dict] = {}
+        self.requests: dict[str, deque] = {"sheets": deque(), "drive": deque()}
+        self.random = random.Random(args.seed)
+
+    def spreadsheet(self, spreadsheet_id: str) -> Spreadsheet:
+        return self.spreadsheets.setdefault(spreadsheet_id, Spreadsheet())
+
+    # Valores de Sheets
+
+    def get_values(self, spreadsheet_id: str, range_name: str) -> dict:
+        sheet_name, first_column, first_row, last_column, last_row = parse_range(range_name)
+        grid = self.spreadsheet(spreadsheet_id).grid(sheet_name)
+        last_row = min(last_row or len(grid), len(grid))
+        rows = []
+        for row in grid[first_row - 1:last_row]:
+            end = last_column if last_column is not None else len(row)
+            rows.append(row[first_column - 1:end])
+        return {"range": range_name, "majorDimension": "ROWS", "values": _trim(rows)}
+
+    def write_values(self, spreadsheet_id: str, range_name: str, values: list[list]) -> int:
+        sheet_name, first_column, first_row, _, _ = parse_range(range_name)
+        grid = self.spreadsheet(spreadsheet_id).grid(sheet_name)
+        cells = 0
+        for i, row in enumerate(values):
+            row_index = first_row - 1 + i
+            while len(grid) <= row_index:
+                grid.append([])
+            target = grid[row_index]
+            for j, value in enumerate(row):
+                column_index = first_column - 1 + j
+                if len(target) <= column_index:
+                    target.extend([""] * (column_index + 1 - len(target)))
+                target[column_index] = "" if value is None else str(value)
+                cells += 1
+        return cells
+
+    def clear_values(self, spreadsheet_id: str, range_name: str) -> None:
+        sheet_name, first_column, first_row, last_column, last_row = parse_range(range_name)
+        grid = self.spreadsheet(spreadsheet_id).grid(sheet_name)
+        for row in grid[first_row - 1:last_row or len(grid)]:
+            end = min(last_column or len(row), len(row))
+            for j in range(first_column - 1, end):
+                row[j] = ""
+
+    # Archivos de Drive
+
+    def add_file(self, name: str, mime_type: str, parents: list[str], content: bytes) -> dict:
+        file_id = uuid.uuid4().hex
+        self.files[file_id] = {"id": file_id, "name": name, "mimeType": mime_type, "parents": parents, "content": content}
+        return self.files[file_id]
+
+    def list_files(self, query: str) -> list[dict]:
+        parent = re.search(r"'([^']+)' in parents", query or "")
+        name = re.search(r"name\s*=\s*'([^']*)'", query or "")
+        result = []
+        for file in self.files.values():
+            if parent and parent.group(1) not in file["parents"]:
+                continue
+            if name and file["name"] != name.group(1):
+                continue
+            result.append(file)
+        return result
+
+    # Simulación de la red
+
+    def throttle(self, api: str) -> int | None:
+        """Devuelve el código de error a simular o None si la petición debe atenderse."""
+        args = self.args
+        delay = args.latency_ms + self.random.uniform(0, args.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        with self.lock:
+            if args.error_rate and self.random.random() < args.error_rate:
+                return 503
+            if args.quota_per_minute:
+                window = self.requests[api]
+                now = time.monotonic()
+                while window and now - window[0] > 60:
+                    window.popleft()
+                if len(window) >= args.quota_per_minute:
+                    return 429
+                window.append(now)
+        return None
+
+
+def seed(state: FakeGoogleState) -> None:
+    args = state.args
+    rng = state.random
+    words = ["Si", "No", "Bogotá", "Antioquia", "Ingeniería", "Maestría", "Mujer", "Hombre", ""]
+    if args.master_rows:
+        rows = [list(SHEET_COLUMNS)]
+        for i in range(1, args.master_rows + 1):
+            rows.append([str(i) if c == "id" else rng.choice(words) for c in SHEET_COLUMNS])
+        state.spreadsheet(args.master_sheet_id).sheets[DEFAULT_SHEET_NAME] = rows
+    if args.form_rows:
+        rows = [[f"Pregunta {i}" for i in range(FORM_COLUMN_COUNT)]]
+        for i in range(args.form_rows):
+            row = [rng.choice(words) for _ in range(FORM_COLUMN_COUNT)]
+            row[8] = f"Persona {i}"
+            row[12] = row[13] = str(10_000_000 + i)
+            rows.append(row)
+        state.spreadsheet(args.form_sheet_id).sheets["Respuestas de formulario 1"] = rows
+    for i in range(args.drive_files):
+        content = os.urandom(rng.randint(1_000, 50_000))
+        mime_type, extension = rng.choice([("application/pdf", "pdf"), ("image/jpeg", "jpg"), ("image/png", "png")])
+        state.add_file(f"archivo_{i}.{extension}", mime_type, ["origen"], content)
+
+
+class Handler(BaseHTTPRequestHandler):
+    state: FakeGoogleState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.state.args.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, reason: str = "") -> None:
+        error = {"code": status, "message": message, "errors": [{"reason": reason or "error", "message": message}]}
+        self._send_json(status, {"error": error})
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self) -> dict:
+        body = self._read_body()
+        return json.loads(body) if body else {}
+
+    def _dispatch(self, method: str) -> None:
+        url = urlparse(self.path)
+        path = url.path
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        api = "sheets" if path.startswith("/v4/") else "drive"
+        error = self.state.throttle(api)
+        if error:
+            # Se consume el cuerpo para mantener viva la conexión
+            self._read_body()
+            reason = "rateLimitExceeded" if error == 429 else "backendError"
+            return self._send_error(error, "Error simulado", reason)
+        try:
+            if api == "sheets":
+                self._handle_sheets(method, path, query)
+            else:
+                self._handle_drive(method, path, query)
+        except (KeyError, ValueError) as e:
+            self._send_error(400, f"Petición inválida: {e}")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _handle_sheets(self, method: str, path: str, query: dict) -> None:
+        state = self.state
+        match = re.fullmatch(r"/v4/spreadsheets/([^/:]+)(.*)", path)
+        if not match:
+            return self._send_error(404, "Ruta desconocida")
+        spreadsheet_id, rest = match.group(1), match.group(2)
+        with state.lock:
+            if method == "GET" and rest == "":
+                sheet_name = query.get("ranges", "")
+                if sheet_name.startswith("'") and sheet_name.endswith("'"):
+                    sheet_name = sheet_name[1:-1].replace("''", "'")
+                row_count = state.spreadsheet(spreadsheet_id).row_count(sheet_name)
+                return self._send_json(200, {"spreadsheetId": spreadsheet_id, "sheets": [
+                    {"properties": {"gridProperties": {"rowCount": row_count}}}]})
+            if method == "POST" and rest == "/values:batchUpdate":
+                body = self._read_json()
+                cells = sum(state.write_values(spreadsheet_id, d["range"], d.get("values", [])) for d in body.get("data", []))
+                return self._send_json(200, {"spreadsheetId": spreadsheet_id, "totalUpdatedCells": cells})
+            if method == "POST" and rest == "/values:batchClear":
+                body = self._read_json()
+                for range_name in body.get("ranges", []):
+                    state.clear_values(spreadsheet_id, range_name)
+                return self._send_json(200, {"spreadsheetId": spreadsheet_id, "clearedRanges": body.get("ranges", [])})
+            values = re.fullmatch(r"/values/(.+?)(:clear)?", rest)
+            if not values:
+                return self._send_error(404, "Ruta desconocida")
+            range_name = unquote(values.group(1))
+            if method == "POST" and values.group(2):
+                self._read_body()
+                state.clear_values(spreadsheet_id, range_name)
+                return self._send_json(200, {"spreadsheetId": spreadsheet_id, "clearedRange": range_name})
+            if method == "GET":
+                return self._send_json(200, state.get_values(spreadsheet_id, range_name))
+            if method == "PUT":
+                body = self._read_json()
+                cells = state.write_values(spreadsheet_id, range_name, body.get("values", []))
+                return self._send_json(200, {"spreadsheetId": spreadsheet_id, "updatedRange": range_name, "updatedCells": cells})
+        self._send_error(404, "Ruta desconocida")
+
+    def _file_body(self, file: dict) -> dict:
+        return {k: file[k] for k in ("id", "name", "mimeType", "parents")}
+
+    def _handle_drive(self, method: str, path: str, query: dict) -> None:
+        state = self.state
+        if path in ("/upload/drive/v3/files", "/resumable/upload/drive/v3/files"):
+            return self._handle_upload_start(method, query)
+        upload = re.fullmatch(r"/upload/sessions/([0-9a-f]+)", path)
+        if upload:
+            return self._handle_upload_chunk(upload.group(1))
+        match = re.fullmatch(r"/drive/v3/files(?:/([^/]+))?(/copy)?", path)
+        if not match:
+            return self._send_error(404, "Ruta desconocida")
+        file_id, copy = match.group(1), match.group(2)
+        with state.lock:
+            if file_id is None:
+                if method == "GET":
+                    files = [self._file_body(f) for f in state.list_files(query.get("q", ""))]
+                    return self._send_json(200, {"files": files})
+                if method == "POST":
+                    body = self._read_json()
+                    file = state.add_file(body.get("name", "sin nombre"), body.get("mimeType", "application/octet-stream"), body.get("parents", []), b"")
+                    return self._send_json(200, self._file_body(file))
+                return self._send_error(404, "Ruta desconocida")
+            file = state.files.get(file_id)
+            if file is None:
+                self._read_body()
+                return self._send_error(404, f"File not found: {file_id}", "notFound")
+            if method == "GET" and query.get("alt") == "media":
+                self.send_response(200)
+                self.send_header("Content-Type", file["mimeType"])
+                self.send_header("Content-Length", str(len(file["content"])))
+                self.end_headers()
+                self.wfile.write(file["content"])
+                return
+            if method == "GET":
+                return self._send_json(200, self._file_body(file))
+            if method == "DELETE":
+                del state.files[file_id]
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if method == "POST" and copy:
+                body = self._read_json()
+                copied = state.add_file(body.get("name", file["name"]), file["mimeType"], body.get("parents", file["parents"]), file["content"])
+                return self._send_json(200, self._file_body(copied))
+        self._send_error(404, "Ruta desconocida")
+
+    def _handle_upload_start(self, method: str, query: dict) -> None:
+        state = self.state
+        upload_type = query.get("uploadType")
+        if method != "POST":
+            return self._send_error(404, "Ruta desconocida")
+        if upload_type == "resumable":
+            metadata = self._read_json()
+            session_id = uuid.uuid4().hex
+            with state.lock:
+                state.uploads[session_id] = {"metadata": metadata, "content": b"",
+                                             "mimeType": self.headers.get("X-Upload-Content-Type", "application/octet-stream")}
+            host = self.headers.get("Host")
+            self.send_response(200)
+            self.send_header("Location", f"http://{host}/upload/sessions/{session_id}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if upload_type == "media":
+            content = self._read_body()
+            with state.lock:
+                file = state.add_file("sin nombre", self.headers.get("Content-Type", "application/octet-stream"), [], content)
+            return self._send_json(200, self._file_body(file))
+        self._read_body()
+        self._send_error(400, f"uploadType no soportado: {upload_type}")
+
+    def _handle_upload_chunk(self, session_id: str) -> None:
+        state = self.state
+        content = self._read_body()
+        content_range = self.headers.get("Content-Range", "")
+        match = re.fullmatch(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", content_range)
+        with state.lock:
+            upload = state.uploads.get(session_id)
+            if upload is None:
+                return self._send_error(404, "Sesión de subida desconocida")
+            upload["content"] += content
+            total = match.group(3) if match else str(len(upload["content"]))
+            if total != "*" and len(upload["content"]) >= int(total):
+                metadata = upload["metadata"]
+                file = state.add_file(metadata.get("name", "sin nombre"), metadata.get("mimeType", upload["mimeType"]),
+                                      metadata.get("parents", []), upload["content"])
+                del state.uploads[session_id]
+                return self._send_json(200, self._file_body(file))
+            received = len(upload["content"])
+        self.send_response(308)
+        if received:
+            self.send_header("Range", f"bytes=0-{received - 1}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor local que imita Sheets v4 y Drive v3.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia agregada a cada petición")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Variación aleatoria de la latencia")
+    parser.add_argument("--quota-per-minute", type=int, default=0, help="Peticiones por minuto por API antes de responder 429 (0 sin límite)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fracción de peticiones que responden 503")
+    parser.add_argument("--master-sheet-id", default="master")
+    parser.add_argument("--master-rows", type=int, default=0, help="Perfiles sintéticos en la hoja maestra")
+    parser.add_argument("--form-sheet-id", default="form")
+    parser.add_argument("--form-rows", type=int, default=0, help="Respuestas sintéticas del formulario")
+    parser.add_argument("--drive-files", type=int, default=0, help="Archivos sintéticos en la carpeta 'origen'")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    state = FakeGoogleState(args)
+    seed(state)
+    Handler.state = state
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"[FAKE_GOOGLE] Escuchando en http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
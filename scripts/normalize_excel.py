@@ -6,6 +6,7 @@ import argparse
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import utils
+from utils import request_scheduler
 
 def get_flag(row: list) -> str:
     ""
@@ -130,6 +131,7 @@ def process_excel_file(input_filename, output_filename):
 
     converted_df = pd.DataFrame(converted_data)
     converted_df.to_excel(output_filename, index=False)
+    request_scheduler.print_stats()
 
 #if __name__ == "__main__":
 #   parser = argparse.ArgumentParser(description="Procesar archivos de entrada y salida.")
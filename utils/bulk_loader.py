@@ -0,0 +1,71 @@
+import sqlite3
+from typing import Any, Iterable
+
+from utils.storage_profile import apply_pragmas
+
+# Llaves por consulta al leer las filas existentes, bajo el límite de parámetros de SQLite
+_SELECT_BLOCK_SIZE = 500
+
+def _row_values(item: dict[str, Any], columns: list[str], key: str) -> tuple:
+    values = []
+    for column in columns:
+        value = item.get(column, "")
+        if column == key:
+            values.append(int(value))
+        else:
+            values.append("" if value is None else str(value))
+    return tuple(values)
+
+def bulk_upsert(file_path: str, table: str, columns: list[str], items: Iterable[dict[str, Any]], key: str = "id") -> tuple[list[Any], list[Any]]:
+    """
+    Inserta o actualiza muchas filas en una sola transacción.
+    Solo se leen las filas existentes con las llaves recibidas, las nuevas se
+    insertan con executemany y en las existentes solo se escriben las columnas
+    que cambiaron. Devuelve las llaves de las filas insertadas y de las actualizadas.
+    """
+    connection = sqlite3.connect(file_path)
+    apply_pragmas(connection)
+    try:
+        with connection:
+            return _bulk_upsert(connection, table, columns, items, key)
+    finally:
+        connection.close()
+
+def _bulk_upsert(connection: sqlite3.Connection, table: str, columns: list[str], items: Iterable[dict[str, Any]], key: str) -> tuple[list[Any], list[Any]]:
+    key_index = columns.index(key)
+    quoted_columns = ", ".join(f'"{c}"' for c in columns)
+    # Si una llave se repite, gana la última fila, igual que al asignar atributo por atributo
+    rows: dict[int, tuple] = {}
+    for item in items:
+        values = _row_values(item, columns, key)
+        rows[values[key_index]] = values
+
+    # Se comparan solo las filas que llegaron, no toda la tabla
+    existing = {}
+    keys = list(rows)
+    for start in range(0, len(keys), _SELECT_BLOCK_SIZE):
+        block = keys[start:start + _SELECT_BLOCK_SIZE]
+        placeholders = ", ".join("?" for _ in block)
+        for row in connection.execute(f'SELECT {quoted_columns} FROM "{table}" WHERE "{key}" IN ({placeholders})', block):
+            existing[row[key_index]] = row
+
+    inserts = []
+    updates: dict[tuple[int, ...], list[tuple]] = {}
+    for row_key, values in rows.items():
+        current = existing.get(row_key)
+        if current is None:
+            inserts.append(values)
+            continue
+        changed = tuple(i for i, value in enumerate(values) if value != current[i])
+        if changed:
+            updates.setdefault(changed, []).append(tuple(values[i] for i in changed) + (row_key,))
+
+    if inserts:
+        placeholders = ", ".join("?" for _ in columns)
+        connection.executemany(f'INSERT INTO "{table}" ({quoted_columns}) VALUES ({placeholders})', inserts)
+    for changed, parameters in updates.items():
+        assignments = ", ".join(f'"{columns[i]}" = ?' for i in changed)
+        connection.executemany(f'UPDATE "{table}" SET {assignments} WHERE "{key}" = ?', parameters)
+    inserted = [values[key_index] for values in inserts]
+    updated = [parameters[-1] for group in updates.values() for parameters in group]
+    return inserted, updated
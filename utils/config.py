@@ -6,6 +6,18 @@ _DEFAULT_CONFIG = {
     "FONT_DPI": 96,
     "MASTER_SHEET_ID": "",
     "MASTER_SHEET_RANGE": "",
+    "IMPORT_WORKERS": 1,
+    "SHEETS_REQUESTS_PER_MINUTE": 60,
+    "DRIVE_REQUESTS_PER_MINUTE": 600,
+    "MAX_REQUESTS_IN_FLIGHT": 4,
+    "GOOGLE_API_ENDPOINT": "",
+    "SHUTDOWN_SYNC_TIMEOUT": 10,
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_MMAP_SIZE": 268435456,
+    "SQLITE_CACHE_SIZE": -65536,
+    "SQLITE_TEMP_STORE": "MEMORY",
+    "SQLITE_BUSY_TIMEOUT": 5000,
 }
 
 class Config:
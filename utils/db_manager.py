@@ -1,14 +1,28 @@
-from pony.orm import Database, Optional, PrimaryKey, db_session
-from typing import Any
+from pony.orm import Database, Optional, PrimaryKey, Required, db_session, flush, select
+from typing import Any, Callable
 
 import os
 import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from utils import reachability
 from utils.gspreadsheet import GSpreadSheet
-from utils.functions import get_abspath_relative_root
+from utils.functions import get_abspath_relative_root, get_profile_unique_key, normalize_document_number, normalize_string
+from utils.bulk_loader import bulk_upsert
+from utils.storage_profile import apply_pragmas
+from utils.sheet_columns import SHEET_COLUMNS
 
 FILE_PATH = get_abspath_relative_root("data/database.sqlite")
+# Perfiles completos que se mantienen en memoria
+PROFILE_CACHE_SIZE = 5000
+# Intentos de una entrada de la bandeja de salida antes de marcarla como fallida
+OUTBOX_MAX_ATTEMPTS = 5
 
 db = Database()
 
@@ -73,68 +87,746 @@ class Profile(db.Entity):
     photo_name = Optional(str)
     photo_link = Optional(str)
     tag = Optional(str)
+    # Columnas locales que no se suben a la hoja de cálculo
+    revision = Optional(int)
+    fingerprint = Optional(str)  # Hash del contenido de la fila en la hoja
+    # Copias normalizadas para buscar con índices, se calculan al escribir
+    full_name_normalized = Optional(str)
+    id_document_number_normalized = Optional(str)
+    tag_normalized = Optional(str)
+    unique_key = Optional(str)  # Llave para reconocer perfiles ya importados
 
+class DeletedProfile(db.Entity):
+    """Perfiles eliminados localmente que aún no se han borrado de la hoja de cálculo."""
+    id = PrimaryKey(int)
+    revision = Required(int)
+
+class ProfileSnapshot(db.Entity):
+    """Contenido de cada fila en la última sincronización, base de la mezcla de tres vías."""
+    id = PrimaryKey(int)
+    fingerprint = Optional(str)
+    data = Optional(str)  # Valores de SHEET_COLUMNS en JSON
+
+class OutboxEntry(db.Entity):
+    """
+    Cambio pendiente de enviar a la nube. Las entradas con la misma llave
+    se combinan: solo se conserva la más reciente.
+    """
+    id = PrimaryKey(int, auto=True)
+    endpoint = Required(str)  # "sheets" o "drive"
+    operation = Required(str)
+    key = Required(str)
+    payload = Optional(str)  # JSON
+    created_at = Required(float)
+    attempts = Required(int, default=0)  # Con OUTBOX_MAX_ATTEMPTS queda fallida y ya no se envía
+    last_error = Optional(str)
+
+class SyncState(db.Entity):
+    key = PrimaryKey(str)
+    value = Optional(int)
+
+# Contador de revisiones y revisión de la última sincronización exitosa
+_REVISION_KEY = "revision"
+_SYNCED_REVISION_KEY = "synced_revision"
+
+def _add_missing_columns(file_path: str, table: str, columns: dict[str, str]) -> None:
+    """Agrega a una tabla existente las columnas nuevas del modelo."""
+    if not os.path.exists(file_path):
+        return
+    connection = sqlite3.connect(file_path)
+    try:
+        existing = {row[1] for row in connection.execute(f'PRAGMA table_info("{table}")')}
+        if not existing:
+            return
+        for column, column_type in columns.items():
+            if column not in existing:
+                connection.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {column_type}')
+        connection.commit()
+    finally:
+        connection.close()
+
+def _create_indexes(file_path: str, table: str, columns: list[str]) -> None:
+    connection = sqlite3.connect(file_path)
+    try:
+        for column in columns:
+            connection.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table.lower()}__{column}" ON "{table}" ("{column}")')
+        connection.commit()
+    finally:
+        connection.close()
+
+# Campos de texto libre indexados en la búsqueda de texto completo
+TEXT_SEARCH_COLUMNS = [
+    "professional_profile", "role_description", "company", "occupation", "role",
+    "undergraduate_degree", "undergraduate_institution", "degree_1_name", "degree_2_name", "degree_3_name",
+]
+
+def _create_text_search_index(file_path: str, columns: list[str]) -> bool:
+    """
+    Crea la tabla FTS5 "ProfileSearch" sobre el contenido de Profile y los
+    disparadores que la mantienen al día. Devuelve False si SQLite no tiene FTS5.
+    """
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    new_values = ", ".join(f'new."{c}"' for c in columns)
+    old_values = ", ".join(f'old."{c}"' for c in columns)
+    delete = f'INSERT INTO "ProfileSearch" ("ProfileSearch", rowid, {quoted}) VALUES (\'delete\', old."id", {old_values});'
+    insert = f'INSERT INTO "ProfileSearch" (rowid, {quoted}) VALUES (new."id", {new_values});'
+    connection = sqlite3.connect(file_path)
+    try:
+        exists = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'ProfileSearch'").fetchone()
+        if not exists:
+            connection.execute(f'CREATE VIRTUAL TABLE "ProfileSearch" USING fts5({quoted}, content="Profile", '
+                               f'content_rowid="id", tokenize="unicode61 remove_diacritics 2")')
+        connection.execute(f'CREATE TRIGGER IF NOT EXISTS "profile_search_insert" AFTER INSERT ON "Profile" BEGIN {insert} END')
+        connection.execute(f'CREATE TRIGGER IF NOT EXISTS "profile_search_delete" AFTER DELETE ON "Profile" BEGIN {delete} END')
+        connection.execute(f'CREATE TRIGGER IF NOT EXISTS "profile_search_update" AFTER UPDATE OF {quoted} ON "Profile" '
+                           f'BEGIN {delete} {insert} END')
+        if not exists:
+            # Indexa los perfiles guardados antes de que existiera la tabla
+            connection.execute('INSERT INTO "ProfileSearch" ("ProfileSearch") VALUES (\'rebuild\')')
+        connection.commit()
+        return True
+    except sqlite3.OperationalError as e:
+        print(f"[DB_MANAGER] Búsqueda de texto completo no disponible: {e}")
+        return False
+    finally:
+        connection.close()
+
+@db.on_connect(provider='sqlite')
+def _configure_connection(db, connection):
+    apply_pragmas(connection)
+
+SEARCH_COLUMNS = ["full_name_normalized", "id_document_number_normalized", "tag_normalized", "unique_key"]
+
+_add_missing_columns(FILE_PATH, "Profile", {"revision": "INTEGER", "fingerprint": "TEXT", **{c: "TEXT" for c in SEARCH_COLUMNS}})
 db.bind(provider='sqlite', filename=FILE_PATH, create_db=True)
 db.generate_mapping(create_tables=True)
+_create_indexes(FILE_PATH, "Profile", SEARCH_COLUMNS)
+TEXT_SEARCH_AVAILABLE = _create_text_search_index(FILE_PATH, TEXT_SEARCH_COLUMNS)
+
+_LOCAL_COLUMNS = ("revision", "fingerprint", *SEARCH_COLUMNS)
+if [c for c in Profile._columns_ if c not in _LOCAL_COLUMNS] != SHEET_COLUMNS:
+    raise RuntimeError("Las columnas de Profile no coinciden con utils/sheet_columns.py")
+# Columnas escritas con bulk_upsert al cargar filas de la hoja
+_LOADED_COLUMNS = SHEET_COLUMNS + ["fingerprint"] + SEARCH_COLUMNS
+
+def row_fingerprint(values: list[Any]) -> str:
+    """
+    Hash estable del contenido de una fila en el orden de SHEET_COLUMNS.
+    Los valores se comparan como texto, igual que los devuelve la hoja.
+    """
+    text = "\x1f".join("" if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def enqueue_outbox(endpoint: str, operation: str, key: str, payload: dict[str, Any] | None = None) -> None:
+    """Registra un cambio en la bandeja de salida; debe llamarse dentro de db_session."""
+    select(e for e in OutboxEntry if e.key == key).delete(bulk=True)
+    OutboxEntry(endpoint=endpoint, operation=operation, key=key,
+                payload=json.dumps(payload) if payload is not None else "", created_at=time.time())
+
+def search_values(profile: dict[str, Any]) -> dict[str, str]:
+    """Valores de SEARCH_COLUMNS para un perfil."""
+    return {
+        "full_name_normalized": normalize_string(profile.get("full_name") or ""),
+        "id_document_number_normalized": normalize_document_number(profile.get("id_document_number") or ""),
+        "tag_normalized": normalize_string(profile.get("tag") or ""),
+        "unique_key": get_profile_unique_key(profile),
+    }
+
+# Campos que se filtran sobre su columna normalizada e indexada, con su normalización
+INDEXED_FIELDS = {
+    "full_name": ("full_name_normalized", normalize_string),
+    "id_document_number": ("id_document_number_normalized", normalize_document_number),
+    "tag": ("tag_normalized", normalize_string),
+}
+
+def text_search_query(text: str) -> str:
+    """
+    Convierte lo escrito por el usuario en una consulta FTS5: cada palabra
+    es un prefijo y deben aparecer todas.
+    """
+    words = normalize_string(text).split()
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+def _row_text(values: list[Any]) -> list[str]:
+    return ["" if value is None else str(value) for value in values]
+
+def _chunks(ids: list[int], size: int = 500):
+    """Divide una lista de ids para no superar el límite de parámetros de SQLite."""
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
 
 class DbManager:
     def __init__(self):
         self.gspreadsheet = None
+        # Conflictos de la última sincronización: id, columna, valor local y remoto
+        self.last_conflicts: list[dict[str, Any]] = []
+        # Conflictos de todas las sincronizaciones, incluidas las de la bandeja
+        # de salida, que la interfaz aún no ha mostrado
+        self._unreported_conflicts: list[dict[str, Any]] = []
+        self._conflicts_lock = threading.Lock()
+        # Evita que el hilo de sincronización y la bandeja de salida sincronicen a la vez
+        self._sync_lock = threading.Lock()
+        # Perfiles leídos o escritos recientemente, del menos al más reciente
+        self._cache: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Aumenta con cada escritura; una lectura de la base solo se guarda en
+        # memoria si ninguna escritura terminó mientras se leía
+        self._cache_epoch = 0
+        # Ordena el guardado de un perfil con su actualización en memoria
+        self._write_lock = threading.Lock()
+        self._listeners: list[Callable[[list[int]], None]] = []
+        self._backfill_search_columns()
 
     def set_gspreadsheet(self, gspreadsheet: GSpreadSheet):
         self.gspreadsheet = gspreadsheet
 
+    def add_listener(self, listener: Callable[[list[int]], None]) -> None:
+        """
+        Registra una función que recibe los ids de los perfiles que cambiaron
+        en la base local. Se llama desde el hilo que hizo el cambio.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[list[int]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(list(ids))
+            except Exception as e:
+                print(f"[DB_MANAGER] Error al notificar cambios: {e}")
+
+    def _cache_get(self, ids: list[int]) -> tuple[list[dict[str, Any]], list[int], int]:
+        """Copias de los perfiles en memoria, los ids que no estaban y la época para _cache_put."""
+        found, missing = [], []
+        with self._cache_lock:
+            for id in ids:
+                profile = self._cache.get(id)
+                if profile is None:
+                    missing.append(id)
+                else:
+                    self._cache.move_to_end(id)
+                    found.append(dict(profile))
+            return found, missing, self._cache_epoch
+
+    def _cache_put(self, profiles: list[dict[str, Any]], epoch: int) -> None:
+        """Guarda perfiles leídos de la base, salvo que una escritura haya terminado desde `epoch`."""
+        with self._cache_lock:
+            if epoch != self._cache_epoch:
+                return
+            self._cache_store(profiles)
+
+    def _cache_store(self, profiles: list[dict[str, Any]]) -> None:
+        for profile in profiles:
+            self._cache[profile["id"]] = dict(profile)
+            self._cache.move_to_end(profile["id"])
+        while len(self._cache) > PROFILE_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _cache_replace(self, profiles: list[dict[str, Any]]) -> None:
+        """Guarda perfiles recién escritos; las lecturas en curso ya no pueden reemplazarlos."""
+        with self._cache_lock:
+            self._cache_epoch += 1
+            self._cache_store(profiles)
+
+    def _cache_invalidate(self, ids: list[int]) -> None:
+        with self._cache_lock:
+            self._cache_epoch += 1
+            for id in ids:
+                self._cache.pop(id, None)
+
+    def _get_state(self, key: str) -> int | None:
+        state = SyncState.get(key=key)
+        return state.value if state else None
+
+    def _set_state(self, key: str, value: int) -> None:
+        state = SyncState.get(key=key)
+        if state:
+            state.value = value
+        else:
+            SyncState(key=key, value=value)
+
+    def _next_revision(self) -> int:
+        revision = (self._get_state(_REVISION_KEY) or 0) + 1
+        self._set_state(_REVISION_KEY, revision)
+        return revision
+
+    @db_session
+    def _local_db_is_empty(self) -> bool:
+        return Profile.select().count() == 0
+
     @db_session
-    def synchronize(self):
+    def _get_synced_revision(self) -> int | None:
+        return self._get_state(_SYNCED_REVISION_KEY)
+
+    def synchronize(self, progress: Callable[[str], None] | None = None) -> list[int]:
+        """
+        Sincroniza la base local con la hoja de cálculo. `progress` recibe mensajes
+        de avance. Devuelve los ids de los perfiles que cambiaron en la base local.
+        """
+        with self._sync_lock:
+            changed_ids = self._synchronize(progress or (lambda message: None))
+            with self._conflicts_lock:
+                self._unreported_conflicts.extend(self.last_conflicts)
+        self._cache_invalidate(changed_ids)
+        self._notify(changed_ids)
+        return changed_ids
+
+    def take_conflicts(self) -> list[dict[str, Any]]:
+        """Devuelve y olvida los conflictos acumulados desde la última llamada."""
+        with self._conflicts_lock:
+            conflicts, self._unreported_conflicts = self._unreported_conflicts, []
+        return conflicts
+
+    def push_pending(self, timeout: float) -> bool:
+        """
+        Envía los cambios locales pendientes esperando como máximo `timeout`
+        segundos. Si no alcanza, la sincronización sigue en un hilo que muere
+        con el programa y los cambios quedan en la bandeja de salida para el
+        próximo inicio. Devuelve True si no quedó nada por enviar.
+        """
+        if self.gspreadsheet is None or not self.get_outbox_ids("sheets"):
+            return True
+        errors = []
+        def run():
+            try:
+                self.synchronize()
+            except Exception as e:
+                errors.append(e)
+        thread = threading.Thread(target=run, name="shutdown-sync", daemon=True)
+        thread.start()
+        thread.join(max(timeout, 0))
+        if thread.is_alive():
+            print(f"[DB_MANAGER] La sincronización de cierre superó {timeout:.0f} s, "
+                  "los cambios pendientes se enviarán en el próximo inicio")
+            return False
+        if errors:
+            print(f"[DB_MANAGER] Error en la sincronización de cierre: {errors[0]}")
+        return not self.get_outbox_ids("sheets")
+
+    def _synchronize(self, progress: Callable[[str], None]) -> list[int]:
         if self.gspreadsheet is None:
             raise ValueError("Variable gspreadsheet no establecido")
+        progress("Conectando con la base de datos remota...")
         self.gspreadsheet.restart_service()
         if not self.gspreadsheet.available:
             print("[DB_MANAGER] No se pudo establecer conexión con la base de datos remota")
-            return
+            return []
     
-        local_data = self.fetch_profiles()        
-        if len(local_data) == 0:
-            self._update_local_db_with_gspreadsheet()
-            print("[DB_MANAGER] Actualizando datos locales")
-        else:
-            self._update_gspreadsheet_with_local_db()
-            print("[DB_MANAGER] Actualizando datos en la nube")
-            
+        # Se toma la revisión antes de leer el estado local: los cambios hechos
+        # mientras corre la sincronización quedan para la siguiente. Lo mismo
+        # con las entradas de la bandeja de salida anteriores a este punto.
+        revision = self._get_revision()
+        outbox_ids = self.get_outbox_ids("sheets")
+        changed_ids = []
+        try:
+            if self._local_db_is_empty():
+                progress("Descargando perfiles...")
+                changed_ids = self._update_local_db_with_gspreadsheet()
+                print("[DB_MANAGER] Actualizando datos locales")
+            elif self._get_synced_revision() is None:
+                progress("Subiendo perfiles...")
+                self._update_gspreadsheet_with_local_db()
+                print("[DB_MANAGER] Actualizando datos en la nube")
+            else:
+                progress("Comparando cambios...")
+                changed_ids = self._sync_changes()
+        except reachability.OfflineError:
+            # Sin marcar la revisión: lo pendiente se envía en la próxima sincronización
+            print("[DB_MANAGER] Se perdió la conexión durante la sincronización")
+            return []
+        self._mark_synced(revision)
+        self.complete_outbox(outbox_ids)
+        return changed_ids
 
     @db_session
-    def _update_local_db_with_gspreadsheet(self):
-        data: list[dict[str, Any]] = self.gspreadsheet.fetch_data()
-        for item in data:
-            profile = Profile.get(id=item.get('id'))
-            if not profile:
-                Profile(**item)
-            else:
-                for key, value in item.items():
-                    setattr(profile, key, value)
-        print("[DB_MANAGER] Numero de entradas:", Profile.select().count())
+    def _get_revision(self) -> int:
+        return self._get_state(_REVISION_KEY) or 0
 
     @db_session
+    def _mark_synced(self, revision: int) -> None:
+        """Guarda la revisión sincronizada y descarta las eliminaciones ya aplicadas."""
+        self._set_state(_SYNCED_REVISION_KEY, revision)
+        select(d for d in DeletedProfile if d.revision <= revision).delete(bulk=True)
+
+    def _sheet_item(self, item: dict[str, Any]) -> dict[str, Any]:
+        item["fingerprint"] = row_fingerprint([item.get(c, "") for c in SHEET_COLUMNS])
+        item.update(search_values(item))
+        return item
+
+    def _sheet_items(self):
+        # La hoja maestra se lee en una sola petición, sin contar filas antes
+        for item in self.gspreadsheet.fetch_data():
+            profile_id = str(item.get('id', '')).strip()
+            if not profile_id:
+                continue
+            if not profile_id.isdigit():
+                print(f"[DB_MANAGER] Fila con id inválido: {profile_id}")
+                continue
+            yield self._sheet_item(item)
+
+    def _update_local_db_with_gspreadsheet(self) -> list[int]:
+        # Se escribe fuera de la sesión de Pony, en una sola transacción
+        items = list(self._sheet_items())
+        inserted, updated = bulk_upsert(FILE_PATH, "Profile", _LOADED_COLUMNS, items)
+        self._save_snapshots([[item.get(c, "") for c in SHEET_COLUMNS] for item in items])
+        print(f"[DB_MANAGER] Perfiles insertados: {len(inserted)}, actualizados: {len(updated)}")
+        return inserted + updated
+
+    def _save_snapshots(self, rows: list[list[Any]]) -> None:
+        """Guarda las filas como base de la próxima mezcla."""
+        id_index = SHEET_COLUMNS.index("id")
+        items = []
+        for row in rows:
+            row = _row_text(row)
+            items.append({"id": row[id_index], "fingerprint": row_fingerprint(row), "data": json.dumps(row)})
+        bulk_upsert(FILE_PATH, "ProfileSnapshot", ["id", "fingerprint", "data"], items)
+
+    @db_session
+    def _delete_snapshots(self, ids: list[int]) -> None:
+        for block in _chunks(ids):
+            select(s for s in ProfileSnapshot if s.id in block).delete(bulk=True)
+
+    @db_session
+    def _get_snapshots(self, ids: list[int]) -> dict[int, list[str]]:
+        snapshots = {}
+        for block in _chunks(ids):
+            for snapshot in select(s for s in ProfileSnapshot if s.id in block):
+                snapshots[snapshot.id] = json.loads(snapshot.data)
+        return snapshots
+
+    def _profile_row(self, profile: Profile) -> list[Any]:
+        return [getattr(profile, header, "") for header in SHEET_COLUMNS]
+
+    def _update_fingerprint(self, profile: Profile) -> None:
+        if profile.id is None:
+            flush()
+        profile.fingerprint = row_fingerprint(self._profile_row(profile))
+
+    @db_session
+    def _backfill_fingerprints(self) -> None:
+        """Calcula el hash de los perfiles guardados antes de que existiera la columna."""
+        profiles = list(select(p for p in Profile if p.fingerprint is None))
+        for profile in profiles:
+            self._update_fingerprint(profile)
+        if profiles:
+            print(f"[DB_MANAGER] Hash calculado para {len(profiles)} perfiles")
+
+    def _update_search_columns(self, profile: Profile) -> None:
+        values = search_values({c: getattr(profile, c) for c in ("full_name", "id_document_number", "id_document_type", "tag")})
+        for column, value in values.items():
+            setattr(profile, column, value)
+
+    def _backfill_search_columns(self) -> None:
+        """Calcula las columnas normalizadas de los perfiles guardados antes de que existieran."""
+        with db_session:
+            rows = list(select((p.id, p.full_name, p.id_document_number, p.id_document_type, p.tag)
+                               for p in Profile if p.unique_key is None))
+        if not rows:
+            return
+        items = []
+        for id, full_name, id_document_number, id_document_type, tag in rows:
+            profile = {"full_name": full_name, "id_document_number": id_document_number, "id_document_type": id_document_type, "tag": tag}
+            items.append({"id": id, **search_values(profile)})
+        bulk_upsert(FILE_PATH, "Profile", ["id"] + SEARCH_COLUMNS, items)
+        print(f"[DB_MANAGER] Columnas de búsqueda calculadas para {len(items)} perfiles")
+
     def _update_gspreadsheet_with_local_db(self):
-        sheet_data = self.gspreadsheet.get_raw_data()
-        headers = Profile._columns_
-        values = [list(headers)] + [[getattr(profile, header, "") for header in headers] for profile in Profile.select()]
-        difference = len(sheet_data) - len(values)
-        if difference > 0:
-            values += [['']*len(sheet_data[0])] * difference
+        headers = SHEET_COLUMNS
+        with db_session:
+            values = [list(headers)] + [self._profile_row(profile) for profile in Profile.select()]
         self.gspreadsheet.update_sheet(values)
+        # Se borran las filas sobrantes de la versión anterior de la hoja
+        self.gspreadsheet.clear_rows_from(self.gspreadsheet.first_row() + len(values))
+        with db_session:
+            ProfileSnapshot.select().delete(bulk=True)
+        self._save_snapshots(values[1:])
+
+    def _merge_row(self, profile_id: int, local_row: list[str], remote_row: list[str], base_row: list[str]) -> tuple[list[str], list[int], list[int]]:
+        """
+        Mezcla de tres vías de una fila: cada campo cambiado de un solo lado
+        se toma de ese lado. Si cambió distinto en ambos lados es un conflicto
+        y se conserva el valor local. Devuelve la fila mezclada y las columnas
+        que cambian localmente y en la hoja.
+        """
+        merged, local_changes, remote_changes = [], [], []
+        for i, (local, remote, base) in enumerate(zip(local_row, remote_row, base_row)):
+            if local == remote:
+                merged.append(local)
+            elif local == base:
+                merged.append(remote)
+                local_changes.append(i)
+            else:
+                merged.append(local)
+                remote_changes.append(i)
+                if remote != base:
+                    self.last_conflicts.append({"id": profile_id, "column": SHEET_COLUMNS[i], "local": local, "remote": remote})
+        return merged, local_changes, remote_changes
+
+    def _sync_changes(self) -> list[int]:
+        """
+        Lee la hoja en una sola petición y compara el hash de cada fila con el guardado
+        localmente. Las filas distintas se mezclan campo por campo contra la
+        última versión sincronizada y solo se escriben las celdas que cambiaron,
+        en la hoja y en la base local. Si nada cambió no se escribe en ningún
+        lado. Devuelve los ids que cambiaron localmente.
+        """
+        self.last_conflicts = []
+        self._backfill_fingerprints()
+        rows = iter(self.gspreadsheet.get_raw_data())
+        headers = next(rows, None)
+        if headers != SHEET_COLUMNS:
+            self._update_gspreadsheet_with_local_db()
+            print("[DB_MANAGER] Actualizando datos en la nube")
+            return []
+
+        first_row = self.gspreadsheet.first_row()
+        id_index = SHEET_COLUMNS.index("id")
+        remote: dict[int, tuple[int, str, list[str]]] = {}
+        last_row = first_row
+        for row_number, row in enumerate(rows, start=first_row + 1):
+            last_row = row_number
+            row = _row_text(row[:len(SHEET_COLUMNS)])
+            profile_id = row[id_index].strip()
+            if profile_id.isdigit():
+                remote[int(profile_id)] = (row_number, row_fingerprint(row), row)
+
+        with db_session:
+            synced_revision = self._get_state(_SYNCED_REVISION_KEY)
+            local = {id: (fingerprint, revision is not None and revision > synced_revision)
+                     for id, fingerprint, revision in select((p.id, p.fingerprint, p.revision) for p in Profile)}
+            deleted = set(select(d.id for d in DeletedProfile if d.revision > synced_revision))
+            snapshots = dict(select((s.id, s.fingerprint) for s in ProfileSnapshot))
+
+        merge_ids, append_ids, remove_local, cleared_ids, new_rows, snapshot_rows = [], [], [], [], [], []
+        for profile_id, (fingerprint, changed_locally) in local.items():
+            entry = remote.get(profile_id)
+            if entry is not None:
+                if entry[1] != fingerprint:
+                    merge_ids.append(profile_id)
+                elif snapshots.get(profile_id) != fingerprint:
+                    snapshot_rows.append(entry[2])
+            elif not changed_locally:
+                # Se eliminó de la hoja después de la última sincronización
+                remove_local.append(profile_id)
+            else:
+                if profile_id in snapshots:
+                    self.last_conflicts.append({"id": profile_id, "column": None, "local": "modificado", "remote": "eliminado"})
+                append_ids.append(profile_id)
+        for profile_id, (row_number, fingerprint, row) in remote.items():
+            if profile_id in local:
+                continue
+            if profile_id in deleted:
+                if snapshots.get(profile_id, fingerprint) != fingerprint:
+                    self.last_conflicts.append({"id": profile_id, "column": None, "local": "eliminado", "remote": "modificado"})
+                cleared_ids.append(profile_id)
+            else:
+                new_rows.append(row)
+
+        if not (merge_ids or append_ids or remove_local or cleared_ids or new_rows or snapshot_rows):
+            print("[DB_MANAGER] Sin diferencias con la nube")
+            return []
+
+        cells: dict[int, dict[int, str]] = {}
+        pull_rows: list[list[str]] = list(new_rows)
+        changed_ids = [int(row[id_index]) for row in new_rows]
+        with db_session:
+            profiles = {p.id: p for block in _chunks(merge_ids + append_ids) for p in select(p for p in Profile if p.id in block)}
+            local_rows = {id: _row_text(self._profile_row(p)) for id, p in profiles.items()}
+        bases = self._get_snapshots(merge_ids)
+        for profile_id in merge_ids:
+            row_number, _, remote_row = remote[profile_id]
+            local_row = local_rows[profile_id]
+            base_row = bases.get(profile_id)
+            if base_row is None:
+                # Sin versión base gana el lado que cambió desde la última sincronización
+                base_row = remote_row if local[profile_id][1] else local_row
+            merged, local_changes, remote_changes = self._merge_row(profile_id, local_row, remote_row, base_row)
+            if local_changes:
+                pull_rows.append(merged)
+                changed_ids.append(profile_id)
+            if remote_changes:
+                cells[row_number] = {i + 1: merged[i] for i in remote_changes}
+            snapshot_rows.append(merged)
+        next_row = last_row + 1
+        for profile_id in append_ids:
+            local_row = local_rows[profile_id]
+            cells[next_row] = {i + 1: value for i, value in enumerate(local_row)}
+            next_row += 1
+            snapshot_rows.append(local_row)
+
+        self.gspreadsheet.update_cells(cells)
+        self.gspreadsheet.clear_rows([remote[id][0] for id in cleared_ids])
+        if pull_rows:
+            items = (self._sheet_item(dict(zip(SHEET_COLUMNS, row))) for row in pull_rows)
+            bulk_upsert(FILE_PATH, "Profile", _LOADED_COLUMNS, items)
+        if remove_local:
+            with db_session:
+                for block in _chunks(remove_local):
+                    select(p for p in Profile if p.id in block).delete(bulk=True)
+            changed_ids += remove_local
+        self._save_snapshots(snapshot_rows + new_rows)
+        self._delete_snapshots(remove_local + cleared_ids)
+
+        for conflict in self.last_conflicts:
+            print(f"[DB_MANAGER] Conflicto en {conflict['id']} ({conflict['column']}): "
+                  f"local={conflict['local']!r}, nube={conflict['remote']!r}; se conserva el valor local")
+        print(f"[DB_MANAGER] Celdas subidas en {len(cells)} filas, borradas en la nube {len(cleared_ids)}, "
+              f"actualizados localmente {len(pull_rows)}, borrados localmente {len(remove_local)}, "
+              f"conflictos {len(self.last_conflicts)}")
+        return changed_ids
+
+    @db_session
+    def get_outbox_ids(self, endpoint: str) -> list[int]:
+        return list(select(e.id for e in OutboxEntry if e.endpoint == endpoint and e.attempts < OUTBOX_MAX_ATTEMPTS))
+
+    @db_session
+    def get_outbox_entries(self, endpoint: str) -> list[dict[str, Any]]:
+        entries = select(e for e in OutboxEntry if e.endpoint == endpoint and e.attempts < OUTBOX_MAX_ATTEMPTS)
+        return [e.to_dict() for e in entries.order_by(OutboxEntry.id)]
+
+    @db_session
+    def get_failed_outbox_entries(self) -> list[dict[str, Any]]:
+        """Entradas que agotaron sus intentos o fallaron sin posibilidad de reintento."""
+        entries = select(e for e in OutboxEntry if e.attempts >= OUTBOX_MAX_ATTEMPTS)
+        return [e.to_dict() for e in entries.order_by(OutboxEntry.id)]
+
+    @db_session
+    def enqueue_outbox(self, endpoint: str, operation: str, key: str, payload: dict[str, Any] | None = None) -> None:
+        enqueue_outbox(endpoint, operation, key, payload)
+
+    @db_session
+    def has_outbox_entry(self, key: str) -> bool:
+        return OutboxEntry.exists(key=key)
+
+    @db_session
+    def outbox_entry_exists(self, id: int) -> bool:
+        return OutboxEntry.exists(id=id)
+
+    @db_session
+    def remove_outbox(self, key: str) -> list[dict[str, Any]]:
+        """Quita de la bandeja las entradas con la llave indicada y las devuelve."""
+        entries = list(select(e for e in OutboxEntry if e.key == key))
+        removed = [e.to_dict() for e in entries]
+        for entry in entries:
+            entry.delete()
+        return removed
+
+    @db_session
+    def complete_outbox(self, ids: list[int]) -> None:
+        for block in _chunks(ids):
+            select(e for e in OutboxEntry if e.id in block).delete(bulk=True)
+
+    @db_session
+    def fail_outbox(self, id: int, error: str, permanent: bool = False) -> None:
+        """Registra un intento fallido; con `permanent` la entrada queda fallida de inmediato."""
+        entry = OutboxEntry.get(id=id)
+        if entry:
+            entry.attempts = OUTBOX_MAX_ATTEMPTS if permanent else entry.attempts + 1
+            entry.last_error = error
+
+    @db_session
+    def retry_outbox(self, ids: list[int]) -> None:
+        """Devuelve entradas fallidas a la cola con sus intentos en cero."""
+        for block in _chunks(ids):
+            for entry in select(e for e in OutboxEntry if e.id in block):
+                entry.attempts = 0
+
+    @db_session
+    def outbox_depth(self) -> int:
+        return select(e for e in OutboxEntry if e.attempts < OUTBOX_MAX_ATTEMPTS).count()
+
+    @db_session
+    def outbox_failed_count(self) -> int:
+        return select(e for e in OutboxEntry if e.attempts >= OUTBOX_MAX_ATTEMPTS).count()
 
     @db_session
     def fetch_profiles(self) -> list[dict[str, Any]]:
         return [p.to_dict() for p in Profile.select()]
-    
+
     @db_session
-    def get_profile_by_id(self, id: int) -> dict[str, Any]:
-        profile = Profile.get(id=id)
-        return profile.to_dict() if profile else None
+    def fetch_columns(self, columns: list[str], after_id: int = 0, limit: int | None = None) -> list[tuple]:
+        """
+        Filas de Profile con solo las columnas indicadas, como tuplas en ese
+        orden. Se ordenan por id y empiezan después de `after_id`, así la
+        siguiente página se pide con el id de la última fila recibida.
+        """
+        unknown = [c for c in columns if c not in Profile._columns_]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {unknown}")
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        limit = -1 if limit is None else limit  # -1 en SQLite es sin límite
+        cursor = db.execute(f'SELECT {quoted} FROM "Profile" WHERE "id" > $after_id ORDER BY "id" LIMIT $limit')
+        return cursor.fetchall()
+
+    def iter_columns(self, columns: list[str], page_size: int = 5000):
+        """Recorre todos los perfiles por páginas de `page_size` filas con fetch_columns."""
+        with_id = columns if columns[:1] == ["id"] else ["id"] + columns
+        after_id = 0
+        while True:
+            rows = self.fetch_columns(with_id, after_id, page_size)
+            for row in rows:
+                yield row if with_id is columns else row[1:]
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1][0]
     
+    def get_profiles_by_ids(self, ids: list[int]) -> list[dict[str, Any]]:
+        profiles, missing, epoch = self._cache_get(sorted({int(id) for id in ids}))
+        if missing:
+            with db_session:
+                loaded = []
+                for block in _chunks(missing):
+                    loaded.extend(p.to_dict() for p in select(p for p in Profile if p.id in block))
+            self._cache_put(loaded, epoch)
+            profiles.extend(loaded)
+        return profiles
+
+    def get_profile_by_id(self, id: int) -> dict[str, Any]:
+        profiles = self.get_profiles_by_ids([id])
+        return profiles[0] if profiles else None
+
+    @db_session
+    def find_profile_ids(self, field: str, text: str) -> list[int]:
+        """
+        Ids de los perfiles cuyo campo (uno de INDEXED_FIELDS) contiene `text`
+        en cualquier posición, igual que el filtro por expresión regular.
+        """
+        column, normalize = INDEXED_FIELDS[field]
+        low = normalize(text)
+        if not low:
+            return []
+        # El índice de la columna normalizada ya tiene el id: SQLite recorre
+        # solo el índice, sin leer las filas completas
+        return db.select(f'SELECT "id" FROM "Profile" WHERE instr("{column}", $low) > 0')
+
+    @db_session
+    def search_profiles_text(self, text: str, limit: int = 1000) -> list[int]:
+        """Ids de los perfiles cuyos campos de texto libre contienen `text`, del más al menos relevante."""
+        query = text_search_query(text)
+        if not query or not TEXT_SEARCH_AVAILABLE:
+            return []
+        return db.select('SELECT rowid FROM "ProfileSearch" WHERE "ProfileSearch" MATCH $query '
+                         'ORDER BY bm25("ProfileSearch") LIMIT $limit')
+
     @db_session
+    def get_unique_keys(self) -> set[str]:
+        return set(select(p.unique_key for p in Profile))
+    
     def update_local_db_with_profile(self, profile_data: dict[str, Any]) -> None:
+        # Se notifica después de confirmar la transacción. Guardar y actualizar
+        # la memoria juntos evita que otro guardado deje una versión anterior
+        with self._write_lock:
+            profile = self._save_profile(profile_data)
+            self._cache_replace([profile])
+        self._notify([profile["id"]])
+
+    @db_session
+    def _save_profile(self, profile_data: dict[str, Any]) -> dict[str, Any]:
         profile_id = profile_data.get('id', None)
         # Si el ID está presente, intentamos encontrar el perfil
         if profile_id is not None:
@@ -146,16 +838,39 @@ class DbManager:
                         setattr(profile, key, value)
             else:
                 # Si no encontramos el perfil, creamos uno nuevo
-                Profile(**profile_data)
+                profile = Profile(**profile_data)
+                deleted = DeletedProfile.get(id=int(profile_id))
+                if deleted:
+                    deleted.delete()
         else:
             # Si no hay ID, creamos un nuevo perfil
-            Profile(**profile_data)
-    
-    @db_session
+            profile = Profile(**profile_data)
+        profile.revision = self._next_revision()
+        self._update_search_columns(profile)
+        self._update_fingerprint(profile)
+        enqueue_outbox("sheets", "profile_upsert", f"profile:{profile.id}")
+        return profile.to_dict()
+
     def delete_profile_by_id(self, profile_id: int) -> None:
+        with self._write_lock:
+            deleted = self._delete_profile(profile_id)
+            if deleted:
+                self._cache_invalidate([profile_id])
+        if deleted:
+            self._notify([profile_id])
+
+    @db_session
+    def _delete_profile(self, profile_id: int) -> bool:
         profile = Profile.get(id=profile_id)
         if profile:
             profile.delete()
+            deleted = DeletedProfile.get(id=profile_id)
+            if deleted:
+                deleted.revision = self._next_revision()
+            else:
+                DeletedProfile(id=profile_id, revision=self._next_revision())
+            enqueue_outbox("sheets", "profile_delete", f"profile:{profile_id}")
             print(f"Profile with ID {profile_id} has been deleted.")
-        else:
-            print(f"Profile with ID {profile_id} does not exist.")
\ No newline at end of file
+            return True
+        print(f"Profile with ID {profile_id} does not exist.")
+        return False
\ No newline at end of file
@@ -1,21 +1,20 @@
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 import mimetypes
 from googleapiclient.http import MediaIoBaseUpload
 from requests import HTTPError
 from googleapiclient.errors import HttpError
-import socket
 import os
 import sys
 import io
 import re
+from typing import Any
 
 from  PIL import Image
 import pillow_heif
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from utils.config import Config
-from utils.functions import get_abspath_relative_root, get_file_extension
+from utils import google_clients, reachability, request_scheduler
+from utils.functions import get_file_extension
 
 pillow_heif.register_heif_opener()
 pillow_heif.register_avif_opener()
@@ -24,34 +23,38 @@ class DriveService:
     def __init__(self, config: Config) -> None:
         self.cv_folder_id = config.get("RESUME_FOLDER_ID")
         self.photo_folder_id = config.get("PHOTO_FOLDER_ID")
-        self.creds = self._get_credentials()
-        self.service = self._get_service()
+        self.scopes = ["https://www.googleapis.com/auth/drive"]
+        self.creds = google_clients.get_credentials(self.scopes)
+        self.scheduler = request_scheduler.get_scheduler('drive')
+        self._connected = self._connect()
 
-    def _get_credentials(self) -> Credentials:
-        scopes = ["https://www.googleapis.com/auth/drive"]
-        file = get_abspath_relative_root("credentials.json")
-        return Credentials.from_service_account_file(file, scopes=scopes)
-    
-    def _get_service(self):
-        self.available = True
-        if not self._check_internet_connection():
-            self.available = False
-            return None
-        try:
-            return build('drive', 'v3', credentials=self.creds, static_discovery=False)
-        except HTTPError as _:
-            self.available = False
-
-    def _check_internet_connection(self) -> bool:
+    def _connect(self) -> bool:
+        if not reachability.monitor.is_online():
+            return False
         try:
-            socket.create_connection(("8.8.8.8", 53), timeout=5)
+            google_clients.get_service('drive', 'v3', self.scopes)
             return True
-        except OSError:
+        except (HTTPError, HttpError, ValueError) as _:
             return False
 
-    def restart_service(self) -> bool:
+    @property
+    def service(self):
+        """Cliente compartido de la API de Drive para el hilo actual."""
         if not self.available:
-            self.service = self._get_service()
+            raise reachability.OfflineError("Sin conexión con Google Drive")
+        return google_clients.get_service('drive', 'v3', self.scopes)
+
+    @property
+    def available(self) -> bool:
+        return self._connected and reachability.monitor.is_online()
+
+    def _execute(self, request) -> Any:
+        """Ejecuta la petición a través del planificador compartido (cuota y reintentos)."""
+        return self.scheduler.execute(request)
+
+    def restart_service(self) -> bool:
+        if not self._connected:
+            self._connected = self._connect()
         return self.available
 
     def import_file(self, input_file_url, output_file_name, folder_id, overwrite = False) -> str:
@@ -62,12 +65,12 @@ class DriveService:
         file_id = input_file_url.split('/')[-2]
         
         # Verificar la extensión del archivo mediante los metadatos sin descargarlo
-        file_info = self.service.files().get(fileId=file_id, fields='mimeType, name').execute()
+        file_info = self._execute(self.service.files().get(fileId=file_id, fields='mimeType, name'))
         file_name = file_info.get('name')
         mime_type = file_info.get('mimeType')
 
         query = f"'{folder_id}' in parents and name='{output_file_name}'"
-        existing_files = self.service.files().list(q=query, fields='files(id)').execute().get('files', [])
+        existing_files = self._execute(self.service.files().list(q=query, fields='files(id)')).get('files', [])
         
         # Si ya existe un archivo con el mismo nombre, no hacer nada
         if existing_files and not overwrite:
@@ -77,7 +80,7 @@ class DriveService:
             return copied_file_url
         elif existing_files and overwrite:
             copied_file_id = existing_files[0]['id']
-            self.service.files().delete(fileId=copied_file_id).execute()
+            self._execute(self.service.files().delete(fileId=copied_file_id))
             print(f"Eliminando archivo existente...")
         
         # Si es una imagen y no es JPG, procesar la conversión
@@ -85,7 +88,7 @@ class DriveService:
             print("Convirtiendo imagen...")
             # Descargar el archivo
             request = self.service.files().get_media(fileId=file_id)
-            file_content = io.BytesIO(request.execute())
+            file_content = io.BytesIO(self._execute(request))
 
             # Convertir la imagen a JPG
             image = Image.open(file_content)
@@ -99,7 +102,7 @@ class DriveService:
                 'name': output_file_name,
                 'parents': [folder_id]
             }
-            copied_file = self.service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+            copied_file = self._execute(self.service.files().create(body=file_metadata, media_body=media, fields='id'))
         else:
             # Definir los metadatos para la copia
             file_metadata = {
@@ -107,7 +110,7 @@ class DriveService:
                 'parents': [folder_id]  # Carpeta destino
             }
             # Crear una copia del archivo
-            copied_file = self.service.files().copy(fileId=file_id, body=file_metadata).execute()
+            copied_file = self._execute(self.service.files().copy(fileId=file_id, body=file_metadata))
 
         # Construir la URL del archivo copiado
         copied_file_id = copied_file.get('id')
@@ -126,7 +129,7 @@ class DriveService:
 
         # Verificar si ya existe un archivo con el mismo nombre en la carpeta de Google Drive
         query = f"'{folder_id}' in parents and name='{output_file_name}'"
-        existing_files = self.service.files().list(q=query, fields='files(id)').execute().get('files', [])
+        existing_files = self._execute(self.service.files().list(q=query, fields='files(id)')).get('files', [])
 
         # Si ya existe un archivo con el mismo nombre y no se debe sobrescribir, retornar la URL
         if existing_files and not overwrite:
@@ -136,7 +139,7 @@ class DriveService:
             return copied_file_url
         elif existing_files and overwrite:
             copied_file_id = existing_files[0]['id']
-            self.service.files().delete(fileId=copied_file_id).execute()
+            self._execute(self.service.files().delete(fileId=copied_file_id))
             print(f"Eliminando archivo existente...")
 
         # Si es una imagen y no es JPG, procesar la conversión
@@ -155,7 +158,7 @@ class DriveService:
                     'name': output_file_name,
                     'parents': [folder_id]
                 }
-                copied_file = self.service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+                copied_file = self._execute(self.service.files().create(body=file_metadata, media_body=media, fields='id'))
         else:
             # Si no requiere conversión, subir el archivo directamente
             with open(input_file_path, 'rb') as f:
@@ -164,7 +167,7 @@ class DriveService:
                     'name': output_file_name,
                     'parents': [folder_id]
                 }
-                copied_file = self.service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+                copied_file = self._execute(self.service.files().create(body=file_metadata, media_body=media, fields='id'))
 
         # Construir la URL del archivo copiado
         copied_file_id = copied_file.get('id')
@@ -179,7 +182,7 @@ class DriveService:
                 return ""
             # Extraer el ID del archivo de la URL
             file_id = file_url.split('/')[-2]
-            file_metadata = self.service.files().get(fileId=file_id, fields='name, mimeType').execute()
+            file_metadata = self._execute(self.service.files().get(fileId=file_id, fields='name, mimeType'))
             file_name = file_metadata.get('name', '')
             mime_type = file_metadata.get('mimeType', '')
             mime_types = {
@@ -211,17 +214,23 @@ class DriveService:
         return self.import_local_file(input_file_path, output_file_name, self.photo_folder_id, overwrite)
 
     def delete_file(self, file_url: str) -> bool:
+        """
+        Elimina el archivo de Drive. Devuelve False si la URL no tiene un ID
+        válido; los errores de la API distintos de "no encontrado" se propagan.
+        """
         file_id = self._extract_file_id(file_url)
         if not file_id:
             print(f"No se pudo extraer el ID del archivo de la URL: {file_url}")
             return False
         try:
-            self.service.files().delete(fileId=file_id).execute()
+            self._execute(self.service.files().delete(fileId=file_id))
             print(f"Archivo con ID {file_id} eliminado exitosamente.")
-            return True
         except HttpError as error:
-            print(f"Error al intentar eliminar el archivo: {error}")
-            return False
+            if error.resp.status not in (404, 410):
+                raise
+            # Ya no existe en Drive, que es lo que se buscaba
+            print(f"El archivo con ID {file_id} ya no existe en Drive.")
+        return True
 
     def _extract_file_id(self, file_url: str) -> str:
         # Usa una expresión regular para extraer el ID del archivo de la URL
@@ -0,0 +1,123 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Iterable
+
+import utils.functions as f
+
+# Este módulo no debe importar utils.db_manager: los procesos del pool de
+# formateo lo importan y no deben enlazar ni migrar data/database.sqlite
+
+_no_format = lambda x : x
+_fields_format_functions = {
+    "email_form": _no_format,
+    "authorize_contact": f.format_bool_field,
+    "authorize_participation": f.format_bool_field,
+    "motivations": f.format_motivations,
+    "professional_profile": _no_format,
+    "full_name": f.format_as_title,
+    "birth_date": _no_format,
+    "id_document_type": f.format_identity_document_type,
+    "id_document_number": _no_format,
+    "id_document_number_confirmation": _no_format,
+    "phone": _no_format,
+    "other_phone": _no_format,
+    "email": _no_format,
+    "birth_department": _no_format,
+    "birth_municipality": _no_format,
+    "residence_department": _no_format,
+    "residence_municipality": _no_format,
+    "gender": f.format_gender,
+    "ethnicity_or_culture": f.format_ethnicity,
+    "disability_condition": f.format_disability_condition,
+    "undergraduate_degree": _no_format,
+    "undergraduate_institution": _no_format,
+    "english_level": f.format_language_level,
+    "french_level": f.format_language_level,
+    "portuguese_level": f.format_language_level,
+    "other_languages_level": f.format_language_level,
+    "has_degree": f.format_bool_field,
+    "degree_1": f.format_degree,
+    "degree_1_name": _no_format,
+    "degree_1_status": f.format_degree_status,
+    "degree_2": f.format_degree,
+    "degree_2_name": _no_format,
+    "degree_2_status": f.format_degree_status,
+    "degree_3": f.format_degree,
+    "degree_3_name": _no_format,
+    "degree_3_status": f.format_degree_status,
+    "linkedin": f.format_linkedin,
+    "mv_participation": f.format_bool_field,
+    "mv_program_1": f.format_mv_program,
+    "mv_program_1_year": _no_format,
+    "mv_program_2": f.format_mv_program,
+    "mv_program_2_year": _no_format,
+    "mv_program_3": f.format_mv_program,
+    "mv_program_3_year": _no_format,
+    "mlk_program": f.format_bool_field,
+    "fulbright_seminar": f.format_bool_field,
+    "occupation": f.format_occupation,
+    "company": _no_format,
+    "sector": f.format_sector,
+    "role": f.format_role,
+    "role_description": _no_format,
+    "experience_sector": f.format_sector,
+    "experience_duration": f.format_experience,
+    "resume_link": _no_format,
+    "photo_link": _no_format,
+    "tag": _no_format
+}
+
+_place_fields = [
+    ("birth_department", "birth_municipality"),
+    ("residence_department", "residence_municipality"),
+]
+
+def _get_field(import_config: dict[str, Any], field: str, row: list[Any]) -> str:
+    columns = import_config[field]
+    if type(columns) != list:
+        columns = (int(columns), int(columns))
+    start, end = columns
+    for i in range(start, end+1):
+        if i >= len(row):
+            return ""
+        info = row[i].strip()
+        if info:
+            return info
+    return ""
+
+def _format_column(values: list[str], format_function) -> list[str]:
+    """Formatea una columna aplicando la función una sola vez por cada valor distinto."""
+    if format_function is _no_format:
+        return values
+    formatted = {value: format_function(value) for value in dict.fromkeys(values)}
+    return [formatted[value] for value in values]
+
+def format_rows(import_config: dict[str, Any], rows: list[list[Any]]) -> list[dict[str, str]]:
+    """
+    Formatea las filas de un formulario por columnas: cada valor distinto de
+    cada campo se formatea una sola vez y el resultado se reparte entre las filas.
+    """
+    profiles = [dict() for _ in rows]
+    for field, format_function in _fields_format_functions.items():
+        column = [_get_field(import_config, field, row) for row in rows]
+        for profile, value in zip(profiles, _format_column(column, format_function)):
+            profile[field] = value
+    for department_field, city_field in _place_fields:
+        places = [(p[department_field], p[city_field]) for p in profiles]
+        formatted = {place: f.format_place(*place) for place in dict.fromkeys(places)}
+        for profile, place in zip(profiles, places):
+            profile[department_field], profile[city_field] = formatted[place]
+    return profiles
+
+def _init_worker() -> None:
+    """Prepara cada proceso del pool con los vocabularios ya indexados."""
+    f.warm_up_matchers()
+
+def format_blocks_parallel(import_config: dict[str, Any], blocks: Iterable[list[list[Any]]], workers: int) -> list[dict[str, str]]:
+    """
+    Formatea bloques de filas en un pool de procesos. Cada bloque se envía
+    al pool en cuanto llega y el resultado conserva el orden de las filas.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        results = executor.map(format_rows, repeat(import_config), blocks)
+        return [profile for chunk in results for profile in chunk]
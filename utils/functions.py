@@ -1,15 +1,17 @@
 import os
-import json
-import re
 import urllib.parse
 import unicodedata
-from difflib import get_close_matches, SequenceMatcher
+from difflib import SequenceMatcher
+from functools import lru_cache
 from datetime import datetime
 import webbrowser
 import hashlib
 import secrets
 import time
 
+from utils.options import OptionsRegistry
+from utils.matcher import CloseMatcher
+
 def get_project_root() -> str:
     """Devuelve la ruta absoluta a la raíz del proyecto."""
     return os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -20,34 +22,76 @@ def get_abspath_relative_root(relative_file_path: str) -> str:
     file_path = os.path.join(project_root, relative_file_path)
     return os.path.abspath(file_path)
 
+options = OptionsRegistry(get_abspath_relative_root("data/options.json"))
+
 def get_option(key: str) -> dict | list:
-    with open(get_abspath_relative_root("data/options.json"), "r", encoding="utf-8") as file:
-        data = json.load(file)
-    return data.get(key, None)
+    """Devuelve una copia mutable de la opción. Para solo lectura usar `options`."""
+    return options.get_copy(key)
+
+_NORMALIZED_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
 
+class _NormalizeTable(dict):
+    """
+    Tabla de traducción para str.translate: cada carácter se mapea a su
+    forma sin tildes, en minúscula y sin símbolos. Los caracteres que no
+    están precalculados se calculan la primera vez que aparecen.
+    """
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize('NFD', chr(codepoint)).lower()
+        value = ''.join(c for c in decomposed if c in _NORMALIZED_CHARS or c.isspace())
+        self[codepoint] = value
+        return value
+
+_normalize_table = _NormalizeTable()
+for _codepoint in range(0x250):  # ASCII, Latin-1 y Latin extendido
+    _normalize_table[_codepoint]
+
+@lru_cache(maxsize=8192)
 def normalize_string(text):
     """Elimina caracteres especiales y convierte el texto a minúsculas."""
-    text = unicodedata.normalize('NFD', text)
-    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
-    return re.sub(r'[^a-z0-9\s]', '', text.lower()).strip()
+    return text.translate(_normalize_table).strip()
+
+def normalize_strings(texts) -> list[str]:
+    """Normaliza una lista o columna completa, calculando una sola vez cada valor distinto."""
+    normalized: dict[str, str] = {}
+    result = []
+    for text in texts:
+        value = normalized.get(text)
+        if value is None:
+            value = normalized[text] = text.translate(_normalize_table).strip()
+        result.append(value)
+    return result
+
+@lru_cache(maxsize=128)
+def _get_matcher(possibilities: tuple) -> CloseMatcher:
+    return CloseMatcher(possibilities, normalize_string)
+
+def get_matcher(possibilities) -> CloseMatcher:
+    """Devuelve el índice de coincidencias (cacheado) para una lista de opciones."""
+    if not isinstance(possibilities, tuple):
+        possibilities = tuple(possibilities)
+    return _get_matcher(possibilities)
+
+def warm_up_matchers() -> None:
+    """Construye por adelantado los índices de coincidencias de todas las opciones."""
+    for key in ("id_document_type", "motivations", "gender", "ethnicity_or_culture",
+                "disability_condition", "degree", "degree_status", "mv_program",
+                "occupation", "sector", "role", "experience_duration", "bool"):
+        get_matcher(options.get_list(key))
+    department_cities = options.get_map("department_cities")
+    get_matcher(list(department_cities.keys()))
+    for cities in department_cities.values():
+        get_matcher(cities)
 
 def get_unsensitive_close_matches(word, possibilities, n=3, cutoff=0.6):
     """
     Encuentra lista de coincidiencias suficientemente buenas
     comparando valores normalizados
     """
-    normalized_word = normalize_string(word)
-    normalized_possibilities = [normalize_string(str(s)) for s in possibilities]
-    close_normalized_matches = get_close_matches(normalized_word, normalized_possibilities, n, cutoff)
-    close_matches = []
-    for cnm in close_normalized_matches:
-        index = normalized_possibilities.index(cnm)
-        close_matches.append(possibilities[index])
-    return close_matches
+    return get_matcher(possibilities).close_matches(word, n, cutoff)
 
 def get_closest_match(possibilities: list[str], word: str, default_value = "") -> str:
-    matches = get_unsensitive_close_matches(word, possibilities, n=2)
-    return matches[0] if matches else default_value
+    return get_matcher(possibilities).closest(word, default_value)
 
 def match(a: str, b: str, threshold: float = 0.9) -> bool:
     return SequenceMatcher(None, normalize_string(a), normalize_string(b)).ratio() >= threshold
@@ -73,20 +117,20 @@ def calc_age(birthdate_str: str) -> str:
     return str(age)
 
 def format_identity_document_type(id_doc_type: str) -> str:
-    id_doc_types_list = get_option("id_document_type")
+    id_doc_types_list = options.get_list("id_document_type")
     return get_closest_match(id_doc_types_list, id_doc_type)
 
 def format_motivations(motivations: str) -> str:
     motivations_formated = []
     for m in motivations.split(","):
-        m = get_closest_match(get_option("motivations"), m, None)
+        m = get_closest_match(options.get_list("motivations"), m, None)
         if m is None:
             continue
         motivations_formated.append(m.strip())
     return ",".join(motivations_formated)
 
 def format_place(department_name: str, city_name: str) -> tuple[str, str]:
-    department_cities = get_option("department_cities")
+    department_cities = options.get_map("department_cities")
     departments = list(department_cities.keys())
     if "bogota" in  normalize_string(city_name):
         department_name = get_closest_match(departments, "bogota dc")
@@ -97,15 +141,15 @@ def format_place(department_name: str, city_name: str) -> tuple[str, str]:
     return department_name_formated, city_name_formated
     
 def format_gender(gender: str) -> str:
-    genders = get_option("gender")
+    genders = options.get_list("gender")
     return get_closest_match(genders, gender, "Otro")
 
 def format_ethnicity(ethnicity: str) -> str:
-    ethnicities = get_option("ethnicity_or_culture")
+    ethnicities = options.get_list("ethnicity_or_culture")
     return get_closest_match(ethnicities, ethnicity, "Ninguna")
 
 def format_disability_condition(disability_condition: str) -> str:
-    disabilities = get_option("disability_condition")
+    disabilities = options.get_list("disability_condition")
     return get_closest_match(disabilities, disability_condition, "Ninguna")
 
 def format_as_title(text: str) -> str:
@@ -136,11 +180,11 @@ def format_language_level(level: str) -> str:
     return old_format_transform.get(old_format_key, "No lo habla")
 
 def format_degree(degree: str) -> str:
-    degree_levels = get_option("degree")
+    degree_levels = options.get_list("degree")
     return get_closest_match(degree_levels, degree)
 
 def format_degree_status(status: str) -> str:
-    degree_levels = get_option("degree_status")
+    degree_levels = options.get_list("degree_status")
     return get_closest_match(degree_levels, status)
 
 def format_linkedin(link: str) -> str:
@@ -159,29 +203,29 @@ def format_linkedin(link: str) -> str:
     return "https://www." + link.strip()
 
 def format_mv_program(program: str) -> str:
-    programs_list = get_option("mv_program")
+    programs_list = options.get_list("mv_program")
     return get_closest_match(programs_list, program)
 
 def format_occupation(occupation: str) -> str:
-    occupations_list = get_option("occupation")
+    occupations_list = options.get_list("occupation")
     return get_closest_match(occupations_list, occupation, occupation)
 
 def format_sector(sector: str) -> str:
-    sectors_list = get_option("sector")
+    sectors_list = options.get_list("sector")
     sector = sector.replace("Sector ", "")
     return get_closest_match(sectors_list, sector)
 
 def format_role(role: str) -> str:
-    roles_list = get_option("role")
+    roles_list = options.get_list("role")
     return get_closest_match(roles_list, role)
 
 def format_experience(experience: str) -> str:
-    exp_list = get_option("experience_duration")
+    exp_list = options.get_list("experience_duration")
     return get_closest_match(exp_list, experience)
 
 def format_bool_field(field: str) -> str:
-    options = get_option("bool")
-    return get_closest_match(options, field, "No")
+    bool_options = options.get_list("bool")
+    return get_closest_match(bool_options, field, "No")
 
 def get_file_extension(file: str) -> str:
     _, ext = os.path.splitext(file)
@@ -239,3 +283,13 @@ def get_name_id(name: str) -> str:
         name_id += p[0]
     name_id += parts[-1]
     return name_id
+
+def normalize_document_number(number: str) -> str:
+    """Número de documento sin espacios, puntos ni guiones."""
+    return normalize_string(str(number)).replace(" ", "")
+
+def get_profile_unique_key(profile: dict[str, str]) -> str:
+    """Llave con la que se reconoce un perfil ya importado."""
+    name_id = get_name_id(profile.get("full_name") or "")
+    unique_id = generate_deterministic_id(profile.get("id_document_type") or "")
+    return f"{name_id}-{unique_id}"
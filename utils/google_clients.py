@@ -0,0 +1,171 @@
+import os
+import json
+import threading
+from typing import Any
+
+import httplib2
+import google_auth_httplib2
+from google.auth.credentials import AnonymousCredentials
+from google.oauth2.service_account import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document, V2_DISCOVERY_URI
+
+from utils.config import Config
+from utils.functions import get_abspath_relative_root
+from utils import reachability
+
+CREDENTIALS_FILE = get_abspath_relative_root("credentials.json")
+DISCOVERY_CACHE_DIR = get_abspath_relative_root("data/discovery")
+HTTP_TIMEOUT = 30
+
+_lock = threading.Lock()
+_credentials: dict[tuple[str, ...], Credentials] = {}
+_documents: dict[tuple[str, str], str] = {}
+_local = threading.local()
+_endpoint: str | None = None
+
+
+def get_api_endpoint() -> str:
+    """
+    Servidor alterno configurado en GOOGLE_API_ENDPOINT (por ejemplo el
+    servidor falso de scripts/fake_google_server.py) o "" para usar Google.
+    """
+    global _endpoint
+    if _endpoint is None:
+        endpoint = Config().get("GOOGLE_API_ENDPOINT") or ""
+        _endpoint = endpoint.rstrip("/") + "/" if endpoint else ""
+    return _endpoint
+
+
+def get_credentials(scopes: list[str]) -> Credentials:
+    """
+    Credenciales de la cuenta de servicio compartidas por todo el proceso.
+    Se crean una sola vez por conjunto de permisos, así el token de acceso
+    se renueva una vez y lo aprovechan todas las instancias.
+    """
+    key = tuple(sorted(scopes))
+    with _lock:
+        creds = _credentials.get(key)
+        if creds is None:
+            if get_api_endpoint():
+                # El servidor alterno no valida tokens
+                creds = AnonymousCredentials()
+            else:
+                creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=list(key))
+            _credentials[key] = creds
+        return creds
+
+
+def _discovery_file(api: str, version: str) -> str:
+    return os.path.join(DISCOVERY_CACHE_DIR, f"{api}.{version}.json")
+
+
+def _read_cached_document(api: str, version: str) -> str | None:
+    try:
+        with open(_discovery_file(api, version), "r", encoding="utf-8") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def _download_document(api: str, version: str) -> str | None:
+    # El servidor alterno no publica documentos de descubrimiento
+    if get_api_endpoint() or not reachability.monitor.is_online():
+        return None
+    url = V2_DISCOVERY_URI.format(api=api, apiVersion=version)
+    try:
+        response, content = _MonitoredHttp(timeout=HTTP_TIMEOUT).request(url)
+    except (OSError, httplib2.HttpLib2Error) as e:
+        print(f"[GOOGLE_CLIENTS] No se pudo descargar el documento de {api} {version}: {e}")
+        return None
+    if response.status != 200:
+        print(f"[GOOGLE_CLIENTS] No se pudo descargar el documento de {api} {version}: {response.status}")
+        return None
+    document = content.decode("utf-8")
+    try:
+        json.loads(document)
+        os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+        with open(_discovery_file(api, version), "w", encoding="utf-8") as file:
+            file.write(document)
+    except (ValueError, OSError) as e:
+        print(f"[GOOGLE_CLIENTS] No se pudo guardar el documento de {api} {version}: {e}")
+    return document
+
+
+def get_discovery_document(api: str, version: str) -> str:
+    """
+    Documento de descubrimiento de la API. Se busca en memoria, luego en la
+    caché en disco y luego en los documentos incluidos en googleapiclient,
+    así crear un cliente no espera a la red. Con el documento incluido, la
+    versión actual se descarga en segundo plano para el siguiente inicio;
+    solo se descarga en el momento si la API no trae documento incluido.
+    """
+    key = (api, version)
+    document = _documents.get(key)
+    if document is not None:
+        return document
+    with _lock:
+        document = _documents.get(key)
+        if document is None:
+            document = _read_cached_document(api, version)
+        if document is None:
+            document = discovery_cache.get_static_doc(api, version)
+            if document is not None:
+                threading.Thread(target=_download_document, args=(api, version),
+                                 name=f"discovery-{api}", daemon=True).start()
+        if document is None:
+            document = _download_document(api, version)
+        if document is None:
+            raise ValueError(f"No hay documento de descubrimiento para {api} {version}")
+        _documents[key] = document
+        return document
+
+
+class _MonitoredHttp(httplib2.Http):
+    """Informa al monitor de conexión el resultado de cada petición."""
+    def request(self, *args, **kwargs):
+        try:
+            result = super().request(*args, **kwargs)
+        except (OSError, httplib2.ServerNotFoundError):
+            reachability.monitor.report_failure()
+            raise
+        reachability.monitor.report_success()
+        return result
+
+
+def get_http(scopes: list[str]) -> google_auth_httplib2.AuthorizedHttp:
+    """
+    Transporte HTTP autorizado que reutiliza las conexiones abiertas.
+    httplib2 no es seguro entre hilos, por eso hay uno por hilo y todos
+    comparten las mismas credenciales.
+    """
+    transports = getattr(_local, "transports", None)
+    if transports is None:
+        transports = _local.transports = {}
+    key = tuple(sorted(scopes))
+    http = transports.get(key)
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(get_credentials(scopes), http=_MonitoredHttp(timeout=HTTP_TIMEOUT))
+        transports[key] = http
+    return http
+
+
+def get_service(api: str, version: str, scopes: list[str]) -> Any:
+    """Cliente de la API para el hilo actual; se construye una sola vez por hilo."""
+    services = getattr(_local, "services", None)
+    if services is None:
+        services = _local.services = {}
+    key = (api, version, tuple(sorted(scopes)))
+    service = services.get(key)
+    if service is None:
+        document = get_discovery_document(api, version)
+        endpoint = get_api_endpoint()
+        if endpoint:
+            # Todas las URLs del cliente, incluidas las de subida, salen de rootUrl
+            description = json.loads(document)
+            description["rootUrl"] = description["mtlsRootUrl"] = endpoint
+            description["baseUrl"] = endpoint + description.get("servicePath", "")
+            document = description
+        service = build_from_document(document, http=get_http(scopes))
+        services[key] = service
+    return service
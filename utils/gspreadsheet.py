@@ -1,47 +1,91 @@
-import socket
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from typing import Any
+import re
+from googleapiclient.errors import HttpError
+from typing import Any, Iterator
 from requests import HTTPError
 
+from utils import google_clients, reachability, request_scheduler
+
+# Filas descargadas por cada petición en las lecturas por bloques
+DEFAULT_BLOCK_SIZE = 500
+
+_CELLS_PATTERN = re.compile(r"^([A-Za-z]{0,3})(\d*)(?::([A-Za-z]{0,3})(\d*))?$")
+
+def _column_index(letters: str) -> int:
+    """Convierte una columna en notación A1 (A, B, ..., AA) a su número, empezando en 1."""
+    index = 0
+    for c in letters.upper():
+        index = index * 26 + ord(c) - ord("A") + 1
+    return index
+
+def _column_letters(index: int) -> str:
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+def _group_consecutive(row_numbers) -> list[tuple[int, int]]:
+    """Agrupa números de fila en rangos contiguos (inicio, fin)."""
+    groups: list[tuple[int, int]] = []
+    for row_number in sorted(row_numbers):
+        if groups and groups[-1][1] == row_number - 1:
+            groups[-1] = (groups[-1][0], row_number)
+        else:
+            groups.append((row_number, row_number))
+    return groups
+
+def _quote_sheet_name(sheet_name: str) -> str:
+    if not sheet_name or sheet_name.startswith("'"):
+        return sheet_name
+    return "'" + sheet_name.replace("'", "''") + "'"
+
 class GSpreadSheet:
-    def __init__(self, sheet_id: str, range_name: str, readonly: bool = True):
+    def __init__(self, sheet_id: str, range_name: str, readonly: bool = True, block_size: int = DEFAULT_BLOCK_SIZE):
         self.sheet_id = sheet_id
         self.range_name = range_name
         self.readonly = readonly
-        self.creds = self._get_credentials()
-        self.service = self._get_service()
+        self.block_size = block_size
+        self.scopes = self._get_scopes()
+        self.creds = google_clients.get_credentials(self.scopes)
+        self.scheduler = request_scheduler.get_scheduler('sheets')
+        self._connected = self._connect()
 
-    def _get_credentials(self) -> Credentials:
+    def _get_scopes(self) -> list[str]:
         readonly_text = ".readonly" if self.readonly else ""
-        scopes = [f'https://www.googleapis.com/auth/spreadsheets{readonly_text}']
-        return Credentials.from_service_account_file('credentials.json', scopes=scopes)
-    
-    def _get_service(self):
-        self.available = True
-        if not self._check_internet_connection():
-            self.available = False
-            return None
-        try:
-            return build('sheets', 'v4', credentials=self.creds, static_discovery=False)
-        except HTTPError as _:
-            self.available = False
+        return [f'https://www.googleapis.com/auth/spreadsheets{readonly_text}']
 
-    def _check_internet_connection(self) -> bool:
+    def _connect(self) -> bool:
+        if not reachability.monitor.is_online():
+            return False
         try:
-            socket.create_connection(("8.8.8.8", 53), timeout=5)
+            google_clients.get_service('sheets', 'v4', self.scopes)
             return True
-        except OSError:
+        except (HTTPError, HttpError, ValueError) as _:
             return False
-    
-    def restart_service(self) -> bool:
+
+    @property
+    def service(self):
+        """Cliente compartido de la API de Sheets para el hilo actual."""
         if not self.available:
-            self.service = self._get_service()
+            raise reachability.OfflineError("Sin conexión con Google Sheets")
+        return google_clients.get_service('sheets', 'v4', self.scopes)
+
+    @property
+    def available(self) -> bool:
+        return self._connected and reachability.monitor.is_online()
+
+    def _execute(self, request) -> Any:
+        """Ejecuta la petición a través del planificador compartido (cuota y reintentos)."""
+        return self.scheduler.execute(request)
+
+    def restart_service(self) -> bool:
+        if not self._connected:
+            self._connected = self._connect()
         return self.available
 
     def get_raw_data(self) -> list[list[Any]]:
         sheet = self.service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=self.sheet_id, range=self.range_name).execute()
+        result = self._execute(sheet.values().get(spreadsheetId=self.sheet_id, range=self.range_name))
         data = result.get('values', [])
         if not data:
             return []
@@ -52,6 +96,82 @@ class GSpreadSheet:
 
         return data
 
+    def _split_range(self) -> tuple[str, str, int, str, int | None]:
+        """
+        Separa el rango configurado en (hoja, columna inicial, fila inicial,
+        columna final, fila final). Un rango sin celdas abarca toda la hoja.
+        """
+        sheet_name, cells = self.range_name, ""
+        if "!" in self.range_name:
+            sheet_name, cells = self.range_name.rsplit("!", 1)
+        elif _CELLS_PATTERN.match(self.range_name) and any(c.isdigit() for c in self.range_name):
+            sheet_name, cells = "", self.range_name
+        match = _CELLS_PATTERN.match(cells) if cells else None
+        if not match:
+            return sheet_name, "", 1, "", None
+        start_column, start_row, end_column, end_row = match.groups()
+        start_row = int(start_row) if start_row else 1
+        end_row = int(end_row) if end_row else None
+        return sheet_name, start_column or "", start_row, end_column or start_column or "", end_row
+
+    def _block_range(self, start_row: int, end_row: int) -> str:
+        sheet_name, start_column, _, end_column, _ = self._split_range()
+        cells = f"{start_column}{start_row}:{end_column}{end_row}"
+        return self._sheet_range(sheet_name, cells)
+
+    def _sheet_range(self, sheet_name: str, cells: str) -> str:
+        if not sheet_name:
+            return cells
+        return f"{_quote_sheet_name(sheet_name)}!{cells}"
+
+    def first_row(self) -> int:
+        """Número de fila de la hoja donde empieza el rango (la fila de encabezados)."""
+        return self._split_range()[2]
+
+    def _get_row_count(self) -> int:
+        """Número de filas de la hoja, leído de sus propiedades sin descargar los valores."""
+        sheet_name = self._split_range()[0]
+        kwargs = {"ranges": _quote_sheet_name(sheet_name)} if sheet_name else {}
+        result = self._execute(self.service.spreadsheets().get(spreadsheetId=self.sheet_id,
+            fields="sheets.properties.gridProperties.rowCount", **kwargs))
+        sheets = result.get("sheets", [])
+        if not sheets:
+            return 0
+        return sheets[0]["properties"]["gridProperties"]["rowCount"]
+
+    def iter_raw_blocks(self, skip_header: bool = False) -> Iterator[list[list[Any]]]:
+        """
+        Descarga la hoja en bloques de `block_size` filas y los entrega a medida
+        que llegan. Las filas se rellenan hasta el ancho del encabezado, igual
+        que en get_raw_data.
+        """
+        _, _, first_row, _, last_row = self._split_range()
+        if last_row is None:
+            last_row = self._get_row_count()
+        sheet = self.service.spreadsheets()
+        max_columns = None
+        pending_empty_rows = 0
+        for start in range(first_row, last_row + 1, self.block_size):
+            end = min(start + self.block_size - 1, last_row)
+            result = self._execute(sheet.values().get(spreadsheetId=self.sheet_id, range=self._block_range(start, end)))
+            values = result.get('values', [])
+            if not values:
+                pending_empty_rows += end - start + 1
+                continue
+            # La API omite las filas vacías al final de cada bloque;
+            # se recuperan solo si hay datos después de ellas
+            block = [[] for _ in range(pending_empty_rows)] + values
+            pending_empty_rows = end - start + 1 - len(values)
+            if max_columns is None:
+                max_columns = len(block[0])
+                if skip_header:
+                    block = block[1:]
+            for row in block:
+                if len(row) < max_columns:
+                    row.extend([''] * (max_columns - len(row)))
+            if block:
+                yield block
+
     def parse_data(self, data: list[list[str]]) -> list[dict[str, Any]]:
         if not data or len(data) < 2:
             return []
@@ -76,4 +196,58 @@ class GSpreadSheet:
 
         body = {'values': values}
         sheet = self.service.spreadsheets()
-        sheet.values().update(spreadsheetId=self.sheet_id, range=self.range_name, valueInputOption='RAW', body=body).execute()
+        self._execute(sheet.values().update(spreadsheetId=self.sheet_id, range=self.range_name, valueInputOption='RAW', body=body))
+
+    def _cells_range(self, start_row: int, end_row: int, start_column: int, end_column: int) -> str:
+        sheet_name, first_column, _, _, _ = self._split_range()
+        offset = _column_index(first_column or "A") - 1
+        cells = f"{_column_letters(offset + start_column)}{start_row}:{_column_letters(offset + end_column)}{end_row}"
+        return self._sheet_range(sheet_name, cells)
+
+    def update_cells(self, cells: dict[int, dict[int, Any]]) -> None:
+        """
+        Escribe celdas sueltas en una sola petición batchUpdate. Las llaves son
+        números de fila de la hoja y, dentro de cada fila, números de columna del
+        rango (1 es la primera). Las celdas consecutivas de una fila forman un
+        tramo, y los tramos con las mismas columnas en filas contiguas se
+        escriben como un solo rango rectangular.
+        """
+        if self.readonly:
+            raise PermissionError("La hoja de cálculo está en modo solo lectura.")
+        rows_by_span: dict[tuple[int, int], list[int]] = {}
+        for row_number, columns in cells.items():
+            for span in _group_consecutive(columns):
+                rows_by_span.setdefault(span, []).append(row_number)
+        data = []
+        for (start, end), row_numbers in sorted(rows_by_span.items()):
+            for first_row, last_row in _group_consecutive(row_numbers):
+                values = [[cells[row][column] for column in range(start, end + 1)]
+                          for row in range(first_row, last_row + 1)]
+                data.append({'range': self._cells_range(first_row, last_row, start, end), 'values': values})
+        if not data:
+            return
+        body = {'valueInputOption': 'RAW', 'data': data}
+        sheet = self.service.spreadsheets()
+        self._execute(sheet.values().batchUpdate(spreadsheetId=self.sheet_id, body=body))
+
+    def clear_rows(self, row_numbers: list[int]) -> None:
+        """Borra el contenido de filas sueltas en una sola petición batchClear."""
+        if self.readonly:
+            raise PermissionError("La hoja de cálculo está en modo solo lectura.")
+        if not row_numbers:
+            return
+        ranges = [self._block_range(start, end) for start, end in _group_consecutive(row_numbers)]
+        sheet = self.service.spreadsheets()
+        self._execute(sheet.values().batchClear(spreadsheetId=self.sheet_id, body={'ranges': ranges}))
+
+    def clear_rows_from(self, row_number: int) -> None:
+        """Borra el contenido desde la fila indicada hasta el final del rango."""
+        if self.readonly:
+            raise PermissionError("La hoja de cálculo está en modo solo lectura.")
+        last_row = self._split_range()[4]
+        if last_row is None:
+            last_row = self._get_row_count()
+        if row_number > last_row:
+            return
+        sheet = self.service.spreadsheets()
+        self._execute(sheet.values().clear(spreadsheetId=self.sheet_id, range=self._block_range(row_number, last_row), body={}))
@@ -0,0 +1,78 @@
+from difflib import SequenceMatcher
+from heapq import nlargest
+from typing import Any, Callable, Sequence
+
+
+def _ratio(matches: int, length: int) -> float:
+    # Misma fórmula que difflib._calculate_ratio para obtener resultados idénticos
+    if length:
+        return 2.0 * matches / length
+    return 1.0
+
+
+class CloseMatcher:
+    """
+    Índice reutilizable para buscar coincidencias aproximadas dentro de un
+    vocabulario fijo. Los candidatos se normalizan una sola vez y los resultados
+    son los mismos que los de difflib.get_close_matches sobre los valores
+    normalizados.
+    """
+    def __init__(self, possibilities: Sequence[Any], normalize: Callable[[str], str]) -> None:
+        self.possibilities = possibilities
+        self.normalize = normalize
+        self.candidates = [normalize(str(p)) for p in possibilities]
+        self.lengths = [len(c) for c in self.candidates]
+        # Primera posición de cada valor normalizado (equivale a list.index)
+        self.exact: dict[str, int] = {}
+        for i, candidate in enumerate(self.candidates):
+            self.exact.setdefault(candidate, i)
+        # Índice invertido de caracteres (1-gramas) para acotar quick_ratio
+        self.char_index: dict[str, list[tuple[int, int]]] = {}
+        for i, candidate in enumerate(self.candidates):
+            counts: dict[str, int] = {}
+            for c in candidate:
+                counts[c] = counts.get(c, 0) + 1
+            for c, count in counts.items():
+                self.char_index.setdefault(c, []).append((i, count))
+
+    def _common_chars(self, word: str) -> list[int]:
+        """Cantidad de caracteres en común (multiconjunto) entre `word` y cada candidato."""
+        counts: dict[str, int] = {}
+        for c in word:
+            counts[c] = counts.get(c, 0) + 1
+        common = [0] * len(self.candidates)
+        for c, word_count in counts.items():
+            for i, count in self.char_index.get(c, ()):
+                common[i] += count if count < word_count else word_count
+        return common
+
+    def close_matches(self, word: str, n: int = 3, cutoff: float = 0.6) -> list[Any]:
+        if not n > 0:
+            raise ValueError("n must be > 0: %r" % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        normalized_word = self.normalize(word)
+        word_length = len(normalized_word)
+        common = self._common_chars(normalized_word)
+        s = SequenceMatcher()
+        s.set_seq2(normalized_word)
+        result = []
+        for i, candidate in enumerate(self.candidates):
+            length = self.lengths[i] + word_length
+            if _ratio(min(self.lengths[i], word_length), length) < cutoff:
+                continue
+            if _ratio(common[i], length) < cutoff:
+                continue
+            s.set_seq1(candidate)
+            score = s.ratio()
+            if score >= cutoff:
+                result.append((score, candidate))
+        return [self.possibilities[self.exact[candidate]] for _, candidate in nlargest(n, result)]
+
+    def closest(self, word: str, default_value: Any = "", cutoff: float = 0.6) -> Any:
+        """Mejor coincidencia para `word`; una coincidencia exacta se resuelve en O(1)."""
+        index = self.exact.get(self.normalize(word))
+        if index is not None:
+            return self.possibilities[index]
+        matches = self.close_matches(word, n=1, cutoff=cutoff)
+        return matches[0] if matches else default_value
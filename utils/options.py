@@ -0,0 +1,72 @@
+import os
+import json
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+
+def _freeze(value: Any) -> Any:
+    """Convierte listas y diccionarios en vistas inmutables (tuplas y mappingproxy)."""
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    return value
+
+
+class OptionsRegistry:
+    """
+    Registro en memoria de las opciones de data/options.json.
+    El archivo se lee una sola vez y solo se vuelve a cargar cuando
+    cambia su fecha de modificación.
+    """
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.version = 0
+        self._mtime = None
+        self._options: Mapping[str, Any] = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.file_path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            if mtime is None:
+                data = {}
+            else:
+                with open(self.file_path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+            self._options = _freeze(data)
+            self._mtime = mtime
+            self.version += 1
+
+    def get(self, key: str) -> Any:
+        """Devuelve la vista de solo lectura de la opción o None si no existe."""
+        self._reload_if_changed()
+        return self._options.get(key, None)
+
+    def get_list(self, key: str) -> tuple[str, ...]:
+        value = self.get(key)
+        return value if isinstance(value, tuple) else ()
+
+    def get_map(self, key: str) -> Mapping[str, tuple[str, ...]]:
+        value = self.get(key)
+        return value if isinstance(value, Mapping) else MappingProxyType({})
+
+    def get_copy(self, key: str) -> dict | list | None:
+        """Devuelve una copia mutable de la opción, con la forma original del JSON."""
+        return _thaw(self.get(key))
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from typing import Any
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from utils import reachability
+from utils.request_scheduler import is_retryable
+from utils.config import Config
+from utils.db_manager import DbManager
+from utils.drive_service import DriveService
+from utils.functions import get_abspath_relative_root
+
+# Copias de los archivos locales que esperan a subirse a Drive
+OUTBOX_FILES_DIR = get_abspath_relative_root("data/outbox")
+DRAIN_INTERVAL = 15
+
+_wake_up = threading.Event()
+
+
+def notify() -> None:
+    """Despierta al vaciador para que envíe lo pendiente sin esperar el intervalo."""
+    _wake_up.set()
+
+
+def queue_drive_delete(db_manager: DbManager, file_url: str) -> None:
+    db_manager.enqueue_outbox("drive", "delete_file", f"file:{file_url}", {"file_url": file_url})
+    notify()
+
+
+def _upload_key(profile_id: int, file: str) -> str:
+    return f"{file}:{profile_id}"
+
+
+def has_pending_upload(db_manager: DbManager, profile_id: int, file: str) -> bool:
+    return db_manager.has_outbox_entry(_upload_key(profile_id, file))
+
+
+def cancel_drive_upload(db_manager: DbManager, profile_id: int, file: str) -> bool:
+    """Quita la subida pendiente y su copia local. Devuelve True si había una."""
+    entries = db_manager.remove_outbox(_upload_key(profile_id, file))
+    for entry in entries:
+        path = json.loads(entry["payload"])["path"]
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            # En Windows falla si se está subiendo; el drenador la borra al terminar
+            print(f"[OUTBOX] No se pudo borrar la copia {path}: {e}")
+    return bool(entries)
+
+
+def queue_drive_upload(db_manager: DbManager, profile_id: int, file: str, file_path: str, file_name: str) -> None:
+    """
+    Guarda una copia del archivo y registra su subida a Drive; al subirse se
+    actualizan `{file}_name` y `{file}_link` del perfil.
+    """
+    # La subida nueva reemplaza a la anterior, que ya no necesita su copia
+    cancel_drive_upload(db_manager, profile_id, file)
+    os.makedirs(OUTBOX_FILES_DIR, exist_ok=True)
+    _, extension = os.path.splitext(file_path)
+    copy_path = os.path.join(OUTBOX_FILES_DIR, f"{uuid.uuid4().hex}{extension}")
+    shutil.copyfile(file_path, copy_path)
+    payload = {"profile_id": int(profile_id), "file": file, "path": copy_path, "file_name": file_name}
+    db_manager.enqueue_outbox("drive", "upload_file", _upload_key(profile_id, file), payload)
+    notify()
+
+
+class OutboxDrainer:
+    """
+    Hilo que vacía la bandeja de salida cuando hay conexión. Los cambios de
+    perfiles se envían juntos en una sola sincronización con la hoja y las
+    operaciones de Drive se repiten en orden.
+    """
+    def __init__(self, db_manager: DbManager, config: Config, interval: float = DRAIN_INTERVAL) -> None:
+        self.db_manager = db_manager
+        self.config = config
+        self.interval = interval
+        self.drive_service = None
+        self._thread = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self.drained_total = 0
+        self.last_drain_count = 0
+        self.last_drain_seconds = 0.0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="outbox-drainer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopping = True
+        notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            _wake_up.wait(self.interval)
+            _wake_up.clear()
+            if self._stopping:
+                break
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"[OUTBOX] Error al vaciar la bandeja de salida: {e}")
+
+    def drain(self) -> None:
+        if not reachability.monitor.is_online():
+            return
+        start = time.perf_counter()
+        drained = self._drain_sheets() + self._drain_drive()
+        if drained:
+            with self._lock:
+                self.drained_total += drained
+                self.last_drain_count = drained
+                self.last_drain_seconds = time.perf_counter() - start
+            print(f"[OUTBOX] {drained} cambios enviados en {self.last_drain_seconds:.1f} s")
+
+    def _drain_sheets(self) -> int:
+        pending = len(self.db_manager.get_outbox_ids("sheets"))
+        if not pending or self.db_manager.gspreadsheet is None:
+            return 0
+        self.db_manager.synchronize()
+        if not self.db_manager.gspreadsheet.available:
+            return 0
+        return pending - len(self.db_manager.get_outbox_ids("sheets"))
+
+    def _get_drive_service(self) -> DriveService:
+        if self.drive_service is None:
+            self.drive_service = DriveService(self.config)
+        self.drive_service.restart_service()
+        return self.drive_service
+
+    def _drain_drive(self) -> int:
+        entries = self.db_manager.get_outbox_entries("drive")
+        if not entries:
+            return 0
+        drive_service = self._get_drive_service()
+        if not drive_service.available:
+            return 0
+        done = []
+        for entry in entries:
+            payload = json.loads(entry["payload"])
+            try:
+                if entry["operation"] == "delete_file":
+                    if not drive_service.delete_file(payload["file_url"]):
+                        # Una URL sin ID de archivo no se arregla reintentando
+                        self.db_manager.fail_outbox(entry["id"], f"URL de archivo inválida: {payload['file_url']}", True)
+                        continue
+                elif entry["operation"] == "upload_file":
+                    self._upload(drive_service, entry["id"], payload)
+            except reachability.OfflineError:
+                # No cuenta como intento; se repite cuando vuelva la conexión
+                break
+            except (HttpError, OSError, httplib2.HttpLib2Error) as e:
+                # El planificador ya reintentó los errores temporales; el resto no mejora al repetir
+                permanent = isinstance(e, HttpError) and not is_retryable(e)
+                print(f"[OUTBOX] Falló {entry['operation']} ({entry['key']}): {e}")
+                self.db_manager.fail_outbox(entry["id"], str(e), permanent)
+                if not reachability.monitor.is_online():
+                    break
+                continue
+            done.append(entry["id"])
+        self.db_manager.complete_outbox(done)
+        if done:
+            # Las subidas actualizan perfiles que deben llegar a la hoja
+            notify()
+        return len(done)
+
+    def _upload(self, drive_service: DriveService, entry_id: int, payload: dict[str, Any]) -> None:
+        file = payload["file"]
+        profile_id = payload["profile_id"]
+        if not os.path.exists(payload["path"]):
+            print(f"[OUTBOX] El archivo pendiente ya no existe: {payload['path']}")
+            return
+        if self.db_manager.get_profile_by_id(profile_id) is None:
+            print(f"[OUTBOX] Se descarta la subida de {payload['file_name']}: el perfil {profile_id} ya no existe")
+            os.remove(payload["path"])
+            return
+        if file == "photo":
+            file_link = drive_service.import_local_photo(payload["path"], payload["file_name"], True)
+        else:
+            file_link = drive_service.import_local_resume(payload["path"], payload["file_name"], True)
+        if not self.db_manager.outbox_entry_exists(entry_id) or self.db_manager.get_profile_by_id(profile_id) is None:
+            # Se canceló la subida o se eliminó el perfil mientras se subía
+            print(f"[OUTBOX] Subida cancelada de {payload['file_name']}, se elimina de Drive")
+            if file_link:
+                queue_drive_delete(self.db_manager, file_link)
+        else:
+            self.db_manager.update_local_db_with_profile({
+                "id": profile_id,
+                f"{file}_name": payload["file_name"],
+                f"{file}_link": file_link,
+            })
+        if os.path.exists(payload["path"]):
+            os.remove(payload["path"])
+
+    def stats(self) -> dict[str, float]:
+        depth = self.db_manager.outbox_depth()
+        failed = self.db_manager.outbox_failed_count()
+        with self._lock:
+            throughput = self.last_drain_count / self.last_drain_seconds if self.last_drain_seconds else 0.0
+            return {
+                "depth": depth,
+                "failed": failed,
+                "drained_total": self.drained_total,
+                "throughput": throughput,
+            }
@@ -0,0 +1,95 @@
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+from utils.config import Config
+
+PROBE_HOST = "8.8.8.8"
+PROBE_PORT = 53
+PROBE_TIMEOUT = 3
+RESULT_TTL = 30
+
+
+class OfflineError(ConnectionError):
+    """Se perdió la conexión en medio de una operación con las APIs de Google."""
+
+
+class ReachabilityMonitor:
+    """
+    Estado de la conexión a internet compartido por todo el proceso.
+    El último resultado se guarda durante `ttl` segundos; cuando vence, la
+    comprobación se hace en un hilo aparte y mientras tanto se responde con
+    el valor anterior, así la interfaz nunca espera a la prueba. Las llamadas
+    a la API que fallan por red marcan la conexión como caída.
+    """
+    def __init__(self, host: str = PROBE_HOST, port: int = PROBE_PORT, timeout: float = PROBE_TIMEOUT, ttl: float = RESULT_TTL) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ttl = ttl
+        # Se asume conexión hasta que una prueba o una llamada digan lo contrario
+        self._online = True
+        self._checked_at: float | None = None
+        self._probe_thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at > self.ttl
+
+    def _set_state(self, online: bool) -> None:
+        with self._lock:
+            if online != self._online:
+                print(f"[REACHABILITY] {'Conexión restablecida' if online else 'Sin conexión'}")
+            self._online = online
+            self._checked_at = time.monotonic()
+
+    def _probe(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                return True
+        except OSError:
+            return False
+
+    def _run_probe(self) -> None:
+        self._set_state(self._probe())
+
+    def _start_probe(self) -> threading.Thread:
+        with self._lock:
+            if self._probe_thread is None or not self._probe_thread.is_alive():
+                self._probe_thread = threading.Thread(target=self._run_probe, name="reachability-probe", daemon=True)
+                self._probe_thread.start()
+            return self._probe_thread
+
+    def is_online(self) -> bool:
+        """Último estado conocido; si ya venció, lanza una comprobación sin esperarla."""
+        if self._is_stale():
+            self._start_probe()
+        return self._online
+
+    def check(self) -> bool:
+        """
+        Igual que is_online pero espera la comprobación si el resultado venció.
+        Solo debe usarse fuera del hilo de la interfaz.
+        """
+        if self._is_stale():
+            self._start_probe().join(self.timeout + 1)
+        return self._online
+
+    def report_failure(self) -> None:
+        self._set_state(False)
+
+    def report_success(self) -> None:
+        self._set_state(True)
+
+
+def _probe_address() -> tuple[str, int]:
+    """Con GOOGLE_API_ENDPOINT configurado se comprueba ese servidor en lugar de internet."""
+    endpoint = Config().get("GOOGLE_API_ENDPOINT")
+    if not endpoint:
+        return PROBE_HOST, PROBE_PORT
+    url = urlparse(endpoint)
+    return url.hostname, url.port or (443 if url.scheme == "https" else 80)
+
+
+monitor = ReachabilityMonitor(*_probe_address())
@@ -0,0 +1,190 @@
+import time
+import random
+import threading
+from typing import Any
+
+import httplib2
+from google.auth.exceptions import TransportError
+from googleapiclient.errors import HttpError
+
+from utils import reachability
+from utils.config import Config
+
+# Cuotas por usuario y por minuto usadas si no se configuran
+_DEFAULT_REQUESTS_PER_MINUTE = {
+    "sheets": 60,
+    "drive": 600,
+}
+_DEFAULT_MAX_IN_FLIGHT = 4
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Drive responde 403 cuando se supera la cuota
+_RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded")
+# Crean un archivo nuevo en cada llamada: tras un 5xx el archivo pudo quedar
+# creado, así que solo se repiten si la cuota rechazó la petición
+_NON_IDEMPOTENT_METHODS = {"drive.files.create", "drive.files.copy"}
+
+
+class TokenBucket:
+    """Limita las peticiones a `rate` por segundo permitiendo ráfagas de `capacity`."""
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float) -> None:
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+def is_retryable(error: HttpError) -> bool:
+    """Indica si repetir la petición puede dar otro resultado (429, 5xx o 403 por cuota)."""
+    status = error.resp.status
+    if status in _RETRY_STATUSES:
+        return True
+    return _is_rate_limited(error)
+
+
+def _is_rate_limited(error: HttpError) -> bool:
+    status = error.resp.status
+    content = error.content or b""
+    return status == 429 or (status == 403 and any(reason in content for reason in _RATE_LIMIT_REASONS))
+
+
+def _should_retry(error: HttpError, endpoint: str) -> bool:
+    if endpoint in _NON_IDEMPOTENT_METHODS:
+        return _is_rate_limited(error)
+    return is_retryable(error)
+
+
+class RequestScheduler:
+    """
+    Ejecuta las peticiones de una API de Google respetando la cuota configurada.
+    Las respuestas 429, 5xx y los 403 por cuota se reintentan con espera
+    exponencial aleatoria (las que crean archivos, solo por cuota), y se limita cuántas peticiones hay en curso. Los
+    errores de red se convierten en reachability.OfflineError.
+    """
+    def __init__(self, name: str, requests_per_minute: float, max_in_flight: int = _DEFAULT_MAX_IN_FLIGHT,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0) -> None:
+        self.name = name
+        rate = requests_per_minute / 60
+        self.bucket = TokenBucket(rate, capacity=max(1.0, min(requests_per_minute / 6, 10.0)))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._stats: dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            return stats
+
+    def _backoff(self, attempt: int) -> float:
+        # Espera exponencial con jitter completo
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def execute(self, request: Any, endpoint: str | None = None) -> Any:
+        """Ejecuta un HttpRequest de googleapiclient y devuelve su respuesta."""
+        endpoint = endpoint or getattr(request, "methodId", None) or "desconocido"
+        stats = self._endpoint_stats(endpoint)
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            with self._in_flight:
+                start = time.perf_counter()
+                try:
+                    result = request.execute()
+                except HttpError as e:
+                    latency = time.perf_counter() - start
+                    with self._stats_lock:
+                        stats.record(latency)
+                        if _should_retry(e, endpoint) and attempt < self.max_retries:
+                            stats.retries += 1
+                        else:
+                            stats.failures += 1
+                            raise
+                    delay = self._backoff(attempt)
+                    print(f"[REQUEST_SCHEDULER] {endpoint} respondió {e.resp.status}, reintentando en {delay:.1f} s")
+                except (OSError, httplib2.HttpLib2Error, TransportError) as e:
+                    # La conexión se cayó en medio de la petición
+                    with self._stats_lock:
+                        stats.record(time.perf_counter() - start)
+                        stats.failures += 1
+                    reachability.monitor.report_failure()
+                    raise reachability.OfflineError(f"Se perdió la conexión durante {endpoint}: {e}") from e
+                else:
+                    with self._stats_lock:
+                        stats.record(time.perf_counter() - start)
+                    return result
+            time.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    "calls": s.calls,
+                    "retries": s.retries,
+                    "failures": s.failures,
+                    "mean_latency": s.mean_latency,
+                    "max_latency": s.max_latency,
+                }
+                for endpoint, s in self._stats.items()
+            }
+
+
+_lock = threading.Lock()
+_schedulers: dict[str, RequestScheduler] = {}
+
+
+def get_scheduler(api: str) -> RequestScheduler:
+    """Planificador compartido de la API indicada ("sheets" o "drive")."""
+    with _lock:
+        scheduler = _schedulers.get(api)
+        if scheduler is None:
+            config = Config()
+            requests_per_minute = config.get(f"{api.upper()}_REQUESTS_PER_MINUTE") or _DEFAULT_REQUESTS_PER_MINUTE.get(api, 60)
+            max_in_flight = config.get("MAX_REQUESTS_IN_FLIGHT") or _DEFAULT_MAX_IN_FLIGHT
+            scheduler = RequestScheduler(api, requests_per_minute, max_in_flight)
+            _schedulers[api] = scheduler
+        return scheduler
+
+
+def print_stats() -> None:
+    """Imprime la latencia y los reintentos de cada endpoint usado."""
+    for scheduler in _schedulers.values():
+        for endpoint, s in scheduler.stats().items():
+            print(f"[REQUEST_SCHEDULER] {endpoint}: {s['calls']} llamadas, {s['retries']} reintentos, "
+                  f"{s['failures']} fallidas, {s['mean_latency'] * 1000:.0f} ms promedio, "
+                  f"{s['max_latency'] * 1000:.0f} ms máximo")
@@ -0,0 +1,64 @@
+# Columnas de la hoja maestra, en orden. Coinciden con las columnas de Profile
+# que no son locales; se definen aquí para poder usarlas sin abrir la base local
+SHEET_COLUMNS = [
+    "id",
+    "email_form",
+    "authorize_contact",
+    "authorize_participation",
+    "motivations",
+    "professional_profile",
+    "full_name",
+    "birth_date",
+    "age",
+    "id_document_type",
+    "id_document_number",
+    "id_document_number_confirmation",
+    "phone",
+    "other_phone",
+    "email",
+    "birth_department",
+    "birth_municipality",
+    "residence_department",
+    "residence_municipality",
+    "gender",
+    "ethnicity_or_culture",
+    "disability_condition",
+    "undergraduate_degree",
+    "undergraduate_institution",
+    "english_level",
+    "french_level",
+    "portuguese_level",
+    "other_languages_level",
+    "has_degree",
+    "degree_1",
+    "degree_1_name",
+    "degree_1_status",
+    "degree_2",
+    "degree_2_name",
+    "degree_2_status",
+    "degree_3",
+    "degree_3_name",
+    "degree_3_status",
+    "linkedin",
+    "mv_participation",
+    "mv_program_1",
+    "mv_program_1_year",
+    "mv_program_2",
+    "mv_program_2_year",
+    "mv_program_3",
+    "mv_program_3_year",
+    "mlk_program",
+    "fulbright_seminar",
+    "occupation",
+    "company",
+    "sector",
+    "role",
+    "role_description",
+    "experience_sector",
+    "experience_duration",
+    "resume_name",
+    "resume_link",
+    "photo_name",
+    "photo_link",
+    "tag",
+]
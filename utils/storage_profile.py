@@ -0,0 +1,61 @@
+import sqlite3
+from typing import Any
+
+from utils.config import Config
+
+# Ajustes de SQLite aplicados a cada conexión con data/database.sqlite.
+# Con WAL las lecturas no esperan a la escritura en curso (la sincronización,
+# la importación o el guardado de un perfil), y synchronous=NORMAL solo
+# sincroniza el disco en los puntos de control del WAL.
+_DEFAULT_PROFILE = {
+    "SQLITE_JOURNAL_MODE": "WAL",
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,  # Bytes
+    "SQLITE_CACHE_SIZE": -64 * 1024,  # Negativo: tamaño en KiB
+    "SQLITE_TEMP_STORE": "MEMORY",
+    "SQLITE_BUSY_TIMEOUT": 5000,  # Milisegundos
+}
+_ALLOWED_VALUES = {
+    "SQLITE_JOURNAL_MODE": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "SQLITE_SYNCHRONOUS": {"OFF", "NORMAL", "FULL", "EXTRA"},
+    "SQLITE_TEMP_STORE": {"DEFAULT", "FILE", "MEMORY"},
+}
+
+_pragmas: list[tuple[str, Any]] | None = None
+
+
+def get_pragmas() -> list[tuple[str, Any]]:
+    """
+    Pragmas del perfil de almacenamiento, leídos de la configuración una sola
+    vez. Los valores no válidos se reemplazan por los predeterminados.
+    """
+    global _pragmas
+    if _pragmas is None:
+        config = Config()
+        pragmas = []
+        for key, default in _DEFAULT_PROFILE.items():
+            value = config.get(key)
+            if value is None or value == "":
+                value = default
+            allowed = _ALLOWED_VALUES.get(key)
+            if allowed is not None:
+                value = str(value).upper()
+                if value not in allowed:
+                    print(f"[STORAGE_PROFILE] Valor no válido para {key}: {value}, se usa {default}")
+                    value = default
+            else:
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    print(f"[STORAGE_PROFILE] Valor no válido para {key}: {value}, se usa {default}")
+                    value = default
+            pragmas.append((key.removeprefix("SQLITE_").lower(), value))
+        _pragmas = pragmas
+    return _pragmas
+
+
+def apply_pragmas(connection: sqlite3.Connection) -> None:
+    """Aplica el perfil a una conexión recién abierta, fuera de una transacción."""
+    cursor = connection.cursor()
+    for name, value in get_pragmas():
+        cursor.execute(f"PRAGMA {name} = {value}")